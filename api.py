@@ -1,11 +1,28 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, stream_with_context
 from flask_cors import CORS
-from core.Item import Item
+from core.Item import item_text
 from core.grammar import Grammar, NonTerminal, Terminal, Production
-from core.clr_utils import closure, build_CLR_states, build_parsing_tables, parse_input, tokenize
-from core.lalr_utils import build_LALR_states
-import io
-import sys
+from core.lalr_utils import build_CLR_and_LALR_automata, merge_LR1_states
+from core.tables import build_encoded_tables, decode_tables, action_text, unresolved_conflicts
+from core.parser import parse_tokens, TraceRecorder, token_name
+from core.lexer import compile_lexer, DEFAULT_TOKEN_CLASSES
+from core.build_cache import BuildCache, BuiltAutomata, CachedBuild, grammar_key
+from core.artifacts import save_artifact, load_artifact, artifact_path
+from core.registry import GrammarEntry, GrammarRegistry
+from core.batch import parse_batch
+from core.tree import TreeBuilder
+from core.glr import parse_glr
+from core.incremental import IncrementalParser
+from core.compress import compress_tables
+from core.codegen import generate_parser_module
+from core.modes import MODES, CLR, build_mode_automaton, compare_modes, smallest_conflict_free
+from core.jobs import BuildJobs, BuildProgress, BuildAborted, DONE
+from core.stream import StreamedDict, StreamedList, json_chunks, compress_chunks, supported_encodings
+from collections import OrderedDict
+import os
+import re
+import threading
+import uuid
 import logging
 
 # Configure logging
@@ -15,13 +32,98 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
 
-current_grammar = None
-current_clr_states = None
-current_clr_transitions = None
-current_lalr_states = None
-current_lalr_transitions = None
-current_ACTION = None
-current_GOTO = None
+# Built grammars by content hash, so resubmitting a grammar skips the build
+build_cache = BuildCache(max_entries=128, max_bytes=256 * 1024 * 1024)
+
+# Table artifacts on disk let any worker serve /parse for a known grammar ID
+ARTIFACT_DIR = os.environ.get('LALR_ARTIFACT_DIR', '.lalr_cache')
+
+# Grammar IDs are content hashes (see grammar_key)
+GRAMMAR_ID = re.compile(r'[0-9a-f]{64}')
+
+def load_grammar_entry(grammar_id):
+    """Registry loader: find a grammar built earlier in this process or saved by any process"""
+    if not isinstance(grammar_id, str) or not GRAMMAR_ID.fullmatch(grammar_id):
+        return None
+
+    cached = build_cache.get(grammar_id, loader=True)
+    if cached is not None:
+        return cached.entry
+
+    path = artifact_path(ARTIFACT_DIR, grammar_id) if ARTIFACT_DIR else None
+    if path is None or not os.path.exists(path):
+        return None
+    artifact = load_artifact(path)
+    lexer = compile_lexer(artifact.grammar, artifact.token_classes)
+    return GrammarEntry(grammar_id, artifact.grammar, artifact.tables, lexer)
+
+# Grammars that /parse can use, shared by all request threads
+registry = GrammarRegistry(ttl=int(os.environ.get('LALR_GRAMMAR_TTL', 3600)), loader=load_grammar_entry)
+
+# Incremental parsers for /parse_edit, least recently used first
+MAX_PARSE_SESSIONS = 256
+parse_sessions = OrderedDict()  # session_id -> (GrammarEntry, IncrementalParser, lock)
+parse_sessions_lock = threading.Lock()
+
+# Server-wide build limits; requests may only lower them
+MAX_BUILD_STATES = int(os.environ.get('LALR_MAX_STATES', 200000))
+BUILD_TIMEOUT = float(os.environ.get('LALR_BUILD_TIMEOUT', 300))
+
+# Processes expanding LR(1) states in parallel for each build (1 builds in the request thread)
+BUILD_PROCESSES = int(os.environ.get('LALR_BUILD_PROCESSES', 1))
+
+# Background builds for /build_jobs
+build_jobs = BuildJobs(max_workers=int(os.environ.get('LALR_BUILD_WORKERS', 2)))
+
+# Page sizes for the state, transition and table endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Table rows decoded at a time when streaming a full build
+STREAM_TABLE_ROWS = 64
+
+def find_build(grammar_id):
+    """CachedBuild of a grammar built earlier in this process or saved by any process.
+
+    Builds loaded from an artifact rederive the LALR automaton by merging the
+    saved CLR states and are cached like fresh builds.
+    """
+    if not isinstance(grammar_id, str) or not GRAMMAR_ID.fullmatch(grammar_id):
+        return None
+
+    cached = build_cache.get(grammar_id)
+    if cached is not None:
+        return cached
+
+    path = artifact_path(ARTIFACT_DIR, grammar_id) if ARTIFACT_DIR else None
+    if path is None or not os.path.exists(path):
+        return None
+    artifact = load_artifact(path)
+    states, transitions = artifact.states(), artifact.transitions()
+    built = {artifact.mode: (states, transitions)}
+    if artifact.mode == CLR:
+        built['lalr'] = merge_LR1_states(states, transitions)
+    automata = BuiltAutomata(artifact.grammar, built)
+    lexer = compile_lexer(artifact.grammar, artifact.token_classes)
+    entry = GrammarEntry(grammar_id, artifact.grammar, artifact.tables, lexer)
+    body = serialize_build_summary(grammar_id, automata, artifact.tables, artifact.mode)
+    cached = CachedBuild(entry, body, automata)
+    build_cache.put(cached)
+    return cached
+
+def find_base_build(grammar_id):
+    """(grammar, clr_states, clr_transitions) of an earlier build, for incremental rebuilds"""
+    cached = find_build(grammar_id)
+    if cached is None or CLR not in cached.automata.automata:
+        return None
+    automata = cached.automata
+    return (automata.grammar, *automata.automata[CLR])
+
+def page_bounds(total):
+    """(start, stop) of the page selected by the offset and limit query arguments"""
+    offset = max(int(request.args.get('offset', 0)), 0)
+    limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 0), MAX_PAGE_SIZE)
+    return min(offset, total), min(offset + limit, total)
 
 def serialize_grammar(grammar):
     return {
@@ -34,25 +136,166 @@ def serialize_grammar(grammar):
 def serialize_first_sets(grammar):
     return {str(sym): [str(t) for t in grammar.first[sym]] for sym in grammar.non_terminals}
 
-def serialize_states(states):
-    return [
-        {
-            'id': i,
-            'items': [str(item) for item in state]
+def serialize_build_summary(key, automata, tables, mode=CLR):
+    """Build response: the grammar and automaton sizes; states and tables are served in pages"""
+    grammar = automata.grammar
+    return app.json.dumps({
+        'grammar_id': key,
+        'mode': mode,
+        'grammar': serialize_grammar(grammar),
+        'first_sets': serialize_first_sets(grammar),
+        'symbols': [str(sym) for sym in grammar.symbols],
+        'n_terminals': grammar.n_terminals,
+        **{
+            name: {'n_states': len(states), 'n_transitions': len(transitions)}
+            for name, (states, transitions) in automata.automata.items()
+        },
+        'tables': {
+            'n_states': tables.n_states,
+            'n_terminals': tables.n_terminals,
+            'n_non_terminals': tables.n_non_terminals,
+        },
+        'conflicts': {
+            'total': len(tables.conflicts),
+            'unresolved': len(unresolved_conflicts(tables)),
+        },
+    }).encode('utf-8')
+
+def iter_states(states, grammar, start, stop):
+    for sid in range(start, stop):
+        yield {
+            'id': sid,
+            'items': [item_text(item, grammar) for item in sorted(states[sid])]
         }
-        for i, state in enumerate(states)
-    ]
 
-def serialize_transitions(transitions):
-    return {f"{state},{str(sym)}": target for (state, sym), target in transitions.items()}
+def serialize_states(states, grammar, start, stop):
+    return list(iter_states(states, grammar, start, stop))
+
+def serialize_transitions(edges, grammar):
+    symbols = grammar.symbols
+    return {f"{sid},{symbols[sym_id]}": target for sid, sym_id, target in edges}
 
 def serialize_tables(ACTION, GOTO):
     action_table = {f"{state},{str(term)}": action for (state, term), action in ACTION.items()}
     goto_table = {f"{state},{str(nt)}": next_state for (state, nt), next_state in GOTO.items()}
     return {'ACTION': action_table, 'GOTO': goto_table}
 
+def iter_table_cells(tables, grammar, table, rows=STREAM_TABLE_ROWS):
+    """Yield the ("state,symbol", cell) pairs of serialize_tables' ACTION or GOTO, decoding a block of rows at a time"""
+    index = 0 if table == 'ACTION' else 1
+    for start in range(0, tables.n_states, rows):
+        cells = decode_tables(tables, grammar, start, min(start + rows, tables.n_states))[index]
+        for (state, sym), cell in cells.items():
+            yield f"{state},{sym}", cell
+
+def stream_automata(cached):
+    """The full build as streamed JSON: the summary fields plus every state, transition and table cell"""
+    automata, tables = cached.automata, cached.entry.tables
+    grammar = automata.grammar
+    fields = [
+        ('grammar_id', cached.key),
+        ('grammar', serialize_grammar(grammar)),
+        ('first_sets', serialize_first_sets(grammar)),
+    ]
+    for name, (states, transitions) in automata.automata.items():
+        fields.append((f'{name}_states', StreamedList(iter_states(states, grammar, 0, len(states)))))
+        fields.append((f'{name}_transitions', StreamedDict(
+            (f"{sid},{grammar.symbols[sym_id]}", target) for (sid, sym_id), target in transitions.items()
+        )))
+    fields.append(('tables', StreamedDict([
+        ('ACTION', StreamedDict(iter_table_cells(tables, grammar, 'ACTION'))),
+        ('GOTO', StreamedDict(iter_table_cells(tables, grammar, 'GOTO'))),
+    ])))
+    return json_chunks(StreamedDict(fields))
+
+def serialize_conflict(conflict, grammar):
+    return {
+        'state': conflict.state,
+        'terminal': str(grammar.symbols[conflict.terminal]),
+        'kind': conflict.kind,
+        'actions': [action_text(code, grammar) for code in conflict.actions],
+        'items': [item_text(item, grammar) for item in conflict.items],
+        'chosen': action_text(conflict.chosen, grammar),
+        'resolved_by': conflict.resolved_by,
+    }
+
+def serialize_table_rows(tables, start, stop):
+    """Compact form of table rows start..stop-1: the row-major slices of the encoded arrays.
+
+    action cells are encoded as in core.tables (0 error, s + 1 shift, -1
+    accept, -(p + 1) reduce by production p) and goto cells are target
+    states or -1; columns follow the symbol order of the build summary.
+    """
+    n_terminals, n_non_terminals = tables.n_terminals, tables.n_non_terminals
+    return {
+        'action': tables.action[start * n_terminals:stop * n_terminals].tolist(),
+        'goto': tables.goto[start * n_non_terminals:stop * n_non_terminals].tolist(),
+    }
+
+def serialize_parse_result(result, grammar):
+    response = {'success': result.accepted}
+    if result.steps is not None:
+        response['steps'] = result.steps
+    if not result.accepted:
+        response['parse_error'] = {
+            'position': result.position,
+            'state': result.state,
+            'token': token_name(grammar, result.token),
+            'message': result.error_message(grammar)
+        }
+    return response
+
+def serialize_tree(tree, grammar):
+    """Flat arrays of a ParseTree; symbol IDs index symbol_names."""
+    return {
+        'root': tree.root,
+        'symbol_names': [str(sym) for sym in grammar.symbols],
+        'symbol': tree.symbol.tolist(),
+        'child_start': tree.child_start.tolist(),
+        'child_count': tree.child_count.tolist(),
+        'children': tree.children.tolist(),
+    }
+
+def serialize_forest(forest, grammar):
+    """Parse forest nodes as [symbol ID, start, end] with their families; children index nodes."""
+    index = {}
+    nodes = []
+    for node in forest.families:
+        index[node] = len(nodes)
+        nodes.append(node)
+    for families in forest.families.values():
+        for _, children in families:
+            for child in children:
+                if child not in index:
+                    index[child] = len(nodes)
+                    nodes.append(child)
+    trees = forest.count_trees()
+    return {
+        'root': index[forest.root],
+        'symbol_names': [str(sym) for sym in grammar.symbols],
+        'nodes': [list(node) for node in nodes],
+        'families': [
+            [{'production': prod_id, 'children': [index[child] for child in children]}
+             for prod_id, children in forest.alternatives(node)]
+            for node in nodes
+        ],
+        'trees': trees if trees != float('inf') else None,
+        'ambiguous_nodes': len(forest.ambiguous_nodes()),
+    }
+
+def token_classes_from_json(data):
+    """Optional {"token_classes": {terminal: regex}} overrides the default id/num classes."""
+    classes = data.get('token_classes')
+    if classes is None:
+        return DEFAULT_TOKEN_CLASSES
+    return tuple(classes.items())
+
 def parse_grammar_from_json(data):
-    """Parse grammar definition from JSON data."""
+    """Parse grammar definition from JSON data.
+
+    FIRST is left to the caller (see Grammar.compute_first), which only
+    needs it when the grammar is not already built.
+    """
     nts = data['non_terminals']
     ts = data['terminals']
     start = data['start_symbol']
@@ -80,84 +323,377 @@ def parse_grammar_from_json(data):
             productions.append(Production(non_terminals[lhs], rhs_syms))
 
     grammar = Grammar(non_terminals[start], productions)
+    # Optional [[associativity, [terminal, ...]], ...], lowest precedence first
+    grammar.set_precedence([
+        (assoc, [terminals.get(name, Terminal(name)) for name in names])
+        for assoc, names in data.get('precedence', [])
+    ])
     dollar = Terminal("$")
     grammar.augment()
     grammar.terminals.add(dollar)
-    grammar.compute_first()
-    
+
     return grammar
 
+def build_progress(data):
+    """BuildProgress with the server limits, lowered by optional max_states and timeout fields"""
+    max_states = min(int(data.get('max_states', MAX_BUILD_STATES)), MAX_BUILD_STATES)
+    timeout = min(float(data.get('timeout', BUILD_TIMEOUT)), BUILD_TIMEOUT)
+    return BuildProgress(max_states, timeout)
+
+def build_entry(key, grammar, token_classes, base=None, progress=None, mode=CLR):
+    """Build the automata and tables of a grammar and serialize the build response.
+
+    The tables come from the automaton of the construction mode; the 'clr'
+    mode also derives the LALR automaton for the visualizer. base is the
+    (grammar, clr_states, clr_transitions) of an earlier build that
+    grammar.compute_first was given; its unaffected states are reused.
+    progress reports on and limits the LR(1) construction.
+    """
+    if mode == CLR:
+        # Build CLR once and derive LALR by merging its states
+        logger.info("[LOG clr_build] ========= Building CLR(1) and LALR(1) states")
+        clr_packed, clr_packed_transitions, lalr_packed, lalr_packed_transitions = build_CLR_and_LALR_automata(grammar, base, progress, BUILD_PROCESSES)
+        built = {'clr': (clr_packed, clr_packed_transitions), 'lalr': (lalr_packed, lalr_packed_transitions)}
+        logger.info(f"[LOG clr_complete] ========= CLR(1) build complete: {len(clr_packed)} states")
+        logger.info(f"[LOG lalr_complete] ========= LALR(1) build complete: {len(lalr_packed)} states")
+    else:
+        logger.info(f"[LOG mode_build] ========= Building {mode} states")
+        built = {mode: build_mode_automaton(grammar, mode, progress)}
+    states, transitions = built[mode]
+    tables = build_encoded_tables(states, transitions, grammar)
+    automata = BuiltAutomata(grammar, built)
+
+    lexer = compile_lexer(grammar, token_classes)
+    if ARTIFACT_DIR:
+        try:
+            save_artifact(ARTIFACT_DIR, key, grammar, tables, states, transitions, token_classes, mode)
+        except OSError as e:
+            logger.warning(f"[LOG artifact_error] ========= Could not save table artifact: {e}")
+
+    body = serialize_build_summary(key, automata, tables, mode)
+    return CachedBuild(GrammarEntry(key, grammar, tables, lexer), body, automata)
+
+def run_build(data, progress=None):
+    """Build (or find in the cache) the grammar of a /build_grammar request and register it"""
+    # Construction mode of the parsing tables (see core.modes)
+    mode = data.get('mode', CLR)
+    if mode not in MODES:
+        raise ValueError(f"Unknown construction mode: {mode}")
+
+    # Parse grammar from JSON
+    grammar = parse_grammar_from_json(data)
+    logger.info(f"[LOG grammar_parsed] ========= Grammar parsed successfully: {len(grammar.productions)} productions")
+
+    token_classes = token_classes_from_json(data)
+    key = grammar_key(grammar, token_classes, mode)
+    cached = build_cache.get(key)
+    if cached is not None:
+        logger.info(f"[LOG build_cache_hit] ========= Reusing cached build {key[:12]}")
+    else:
+        # An edit of an earlier build only recomputes what the edit affects
+        base_id = data.get('base_grammar_id')
+        base = find_base_build(base_id) if base_id else None
+        grammar.compute_first(base[0] if base else None)
+        cached = build_entry(key, grammar, token_classes, base if mode == CLR else None, progress, mode)
+        build_cache.put(cached)
+    registry.register(cached.entry)
+    return cached
+
 @app.route('/build_grammar', methods=['POST'])
 def build_grammar():
-    global current_grammar, current_clr_states, current_clr_transitions, current_lalr_states, current_lalr_transitions, current_ACTION, current_GOTO
     data = request.json
     try:
         logger.info("[LOG build_grammar] ========= Starting grammar build process")
-        
-        # Parse grammar from JSON
-        grammar = parse_grammar_from_json(data)
-        logger.info(f"[LOG grammar_parsed] ========= Grammar parsed successfully: {len(grammar.productions)} productions")
-
-        current_grammar = grammar
-
-        # Build CLR
-        logger.info("[LOG clr_build] ========= Building CLR(1) states")
-        clr_states, clr_transitions = build_CLR_states(grammar)
-        clr_ACTION, clr_GOTO = build_parsing_tables(clr_states, clr_transitions, grammar)
-        logger.info(f"[LOG clr_complete] ========= CLR(1) build complete: {len(clr_states)} states")
-
-        # Build LALR
-        logger.info("[LOG lalr_build] ========= Building LALR(1) states")
-        lalr_states, lalr_transitions = build_LALR_states(grammar)
-        logger.info(f"[LOG lalr_complete] ========= LALR(1) build complete: {len(lalr_states)} states")
-
-        current_clr_states = clr_states
-        current_clr_transitions = clr_transitions
-        current_lalr_states = lalr_states
-        current_lalr_transitions = lalr_transitions
-        current_ACTION = clr_ACTION
-        current_GOTO = clr_GOTO
+        cached = run_build(data, build_progress(data))
 
         logger.info("[LOG build_grammar] ========= Grammar build process completed successfully")
-        return jsonify({
-            'grammar': serialize_grammar(grammar),
-            'first_sets': serialize_first_sets(grammar),
-            'clr_states': serialize_states(clr_states),
-            'clr_transitions': serialize_transitions(clr_transitions),
-            'lalr_states': serialize_states(lalr_states),
-            'lalr_transitions': serialize_transitions(lalr_transitions),
-            'clr_tables': serialize_tables(clr_ACTION, clr_GOTO)
-        })
+        return app.response_class(cached.body, mimetype=app.json.mimetype)
     except KeyError as e:
         logger.error(f"[LOG build_grammar_error] ========= Missing required field: {e}")
         return jsonify({'error': f'Missing required field: {e}'}), 400
+    except BuildAborted as e:
+        logger.warning(f"[LOG build_grammar_aborted] ========= Build aborted: {e}")
+        return jsonify({'error': str(e)}), 422
     except Exception as e:
         logger.error(f"[LOG build_grammar_error] ========= Error building grammar: {e}")
         return jsonify({'error': str(e)}), 400
 
-@app.route('/parse', methods=['POST'])
-def parse():
-    global current_grammar, current_ACTION, current_GOTO
-    if not current_grammar or not current_ACTION or not current_GOTO:
-        logger.warning("[LOG parse_error] ========= Parse attempted but grammar not built")
+@app.route('/build_jobs', methods=['POST'])
+def submit_build_job():
+    """Start a /build_grammar request as a background job; poll /build_jobs/<job_id> for progress"""
+    data = request.json
+    try:
+        job = build_jobs.submit(lambda progress: run_build(data, progress), build_progress(data))
+        logger.info(f"[LOG build_job_submitted] ========= Submitted build job {job.job_id[:12]}")
+        return jsonify(job.snapshot()), 202
+    except Exception as e:
+        logger.error(f"[LOG build_job_error] ========= Error submitting build job: {e}")
+        return jsonify({'error': str(e)}), 400
+
+def serialize_job(job):
+    response = job.snapshot()
+    if job.status == DONE:
+        response['grammar_id'] = job.result.key
+    return response
+
+@app.route('/build_jobs/<job_id>', methods=['GET'])
+def build_job_status(job_id):
+    """Status, states discovered and worklist size of a build job"""
+    job = build_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown build job'}), 404
+    return jsonify(serialize_job(job))
+
+@app.route('/build_jobs/<job_id>/result', methods=['GET'])
+def build_job_result(job_id):
+    """The /build_grammar response of a finished build job"""
+    job = build_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown build job'}), 404
+    if job.status != DONE:
+        return jsonify(serialize_job(job)), 409
+    return app.response_class(job.result.body, mimetype=app.json.mimetype)
+
+@app.route('/build_jobs/<job_id>', methods=['DELETE'])
+def cancel_build_job(job_id):
+    """Cancel a build job; a running build stops before expanding its next state"""
+    job = build_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown build job'}), 404
+    logger.info(f"[LOG build_job_cancel] ========= Cancelling build job {job_id[:12]}")
+    return jsonify(serialize_job(job))
+
+@app.route('/grammar/<grammar_id>/<automaton>/states', methods=['GET'])
+def grammar_states(grammar_id, automaton):
+    """A page of CLR or LALR states: ?offset=&limit= select state IDs"""
+    try:
+        cached = find_build(grammar_id)
+        if cached is None:
+            return jsonify({'error': 'Grammar not built'}), 400
+        if automaton not in cached.automata.automata:
+            return jsonify({'error': f'Unknown automaton: {automaton}'}), 400
+
+        states = cached.automata.states(automaton)
+        start, stop = page_bounds(len(states))
+        return jsonify({
+            'offset': start,
+            'total': len(states),
+            'states': serialize_states(states, cached.automata.grammar, start, stop)
+        })
+    except Exception as e:
+        logger.error(f"[LOG grammar_states_error] ========= Error serializing states: {e}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/grammar/<grammar_id>/<automaton>/transitions', methods=['GET'])
+def grammar_transitions(grammar_id, automaton):
+    """Transitions out of a page of CLR or LALR states: ?offset=&limit= select source state IDs"""
+    try:
+        cached = find_build(grammar_id)
+        if cached is None:
+            return jsonify({'error': 'Grammar not built'}), 400
+        if automaton not in cached.automata.automata:
+            return jsonify({'error': f'Unknown automaton: {automaton}'}), 400
+
+        automata = cached.automata
+        total = len(automata.states(automaton))
+        start, stop = page_bounds(total)
+        edges = automata.transitions_from(automaton, start, stop)
+        return jsonify({
+            'offset': start,
+            'total': total,
+            'transitions': serialize_transitions(edges, automata.grammar)
+        })
+    except Exception as e:
+        logger.error(f"[LOG grammar_transitions_error] ========= Error serializing transitions: {e}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/grammar/<grammar_id>/tables', methods=['GET'])
+def grammar_tables(grammar_id):
+    """Parsing table rows: ?offset=&limit= select states, ?format=compact (default) or strings"""
+    try:
+        cached = find_build(grammar_id)
+        if cached is None:
+            return jsonify({'error': 'Grammar not built'}), 400
+
+        grammar, tables = cached.entry.grammar, cached.entry.tables
+        start, stop = page_bounds(tables.n_states)
+        response = {'offset': start, 'total': tables.n_states}
+        table_format = request.args.get('format', 'compact')
+        if table_format == 'compact':
+            response.update(serialize_table_rows(tables, start, stop))
+        elif table_format == 'strings':
+            response.update(serialize_tables(*decode_tables(tables, grammar, start, stop)))
+        else:
+            return jsonify({'error': f'Unknown table format: {table_format}'}), 400
+        return jsonify(response)
+    except Exception as e:
+        logger.error(f"[LOG grammar_tables_error] ========= Error serializing tables: {e}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/grammar/<grammar_id>/tables/packed', methods=['GET'])
+def grammar_packed_tables(grammar_id):
+    """The whole parsing tables compressed (see core.compress), with their compression report"""
+    try:
+        cached = find_build(grammar_id)
+        if cached is None:
+            return jsonify({'error': 'Grammar not built'}), 400
+
+        with cached.compressed_lock:
+            if cached.compressed is None:
+                cached.compressed = compress_tables(cached.entry.tables)
+        compressed = cached.compressed
+        response = {name: arr.tolist() for name, arr in compressed.arrays().items()}
+        response['prod_left'] = compressed.prod_left.tolist()
+        response['prod_len'] = compressed.prod_len.tolist()
+        response['report'] = compressed.report()
+        return jsonify(response)
+    except Exception as e:
+        logger.error(f"[LOG grammar_tables_error] ========= Error compressing tables: {e}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/grammar/<grammar_id>/parser.py', methods=['GET'])
+def grammar_parser_module(grammar_id):
+    """Standalone Python parser module for the grammar (see core.codegen)"""
+    entry = registry.get(grammar_id)
+    if entry is None:
         return jsonify({'error': 'Grammar not built'}), 400
+    try:
+        source = generate_parser_module(entry.grammar, entry.tables, entry.lexer)
+    except Exception as e:
+        logger.error(f"[LOG parser_module_error] ========= Error generating parser module: {e}")
+        return jsonify({'error': str(e)}), 400
+    response = app.response_class(source, mimetype='text/x-python')
+    response.headers['Content-Disposition'] = f'attachment; filename=parser_{grammar_id[:12]}.py'
+    return response
+
+@app.route('/grammar/<grammar_id>/modes', methods=['GET'])
+def grammar_modes(grammar_id):
+    """State count, table size, build time and conflicts of the grammar in every construction mode"""
+    try:
+        cached = find_build(grammar_id)
+        if cached is None:
+            return jsonify({'error': 'Grammar not built'}), 400
+
+        # Concurrent first requests wait for one comparison instead of each running their own
+        with cached.mode_reports_lock:
+            if cached.mode_reports is None:
+                logger.info(f"[LOG grammar_modes] ========= Comparing construction modes for {grammar_id[:12]}")
+                cached.mode_reports = compare_modes(cached.entry.grammar, progress=BuildProgress(MAX_BUILD_STATES, BUILD_TIMEOUT))
+        return jsonify({
+            'modes': {mode: report._asdict() for mode, report in cached.mode_reports.items()},
+            'smallest_conflict_free': smallest_conflict_free(cached.mode_reports),
+        })
+    except BuildAborted as e:
+        logger.warning(f"[LOG grammar_modes_aborted] ========= Mode comparison aborted: {e}")
+        return jsonify({'error': str(e)}), 422
+    except Exception as e:
+        logger.error(f"[LOG grammar_modes_error] ========= Error comparing modes: {e}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/grammar/<grammar_id>/conflicts', methods=['GET'])
+def grammar_conflicts(grammar_id):
+    """CLR table conflicts in state order: ?offset=&limit= page them, ?unresolved=1 skips those settled by precedence"""
+    try:
+        cached = find_build(grammar_id)
+        if cached is None:
+            return jsonify({'error': 'Grammar not built'}), 400
+
+        tables = cached.entry.tables
+        if request.args.get('unresolved'):
+            conflicts = unresolved_conflicts(tables)
+        else:
+            conflicts = [tables.conflicts[key] for key in sorted(tables.conflicts)]
+        start, stop = page_bounds(len(conflicts))
+        return jsonify({
+            'offset': start,
+            'total': len(conflicts),
+            'conflicts': [serialize_conflict(c, cached.entry.grammar) for c in conflicts[start:stop]]
+        })
+    except Exception as e:
+        logger.error(f"[LOG grammar_conflicts_error] ========= Error serializing conflicts: {e}")
+        return jsonify({'error': str(e)}), 400
 
+@app.route('/grammar/<grammar_id>/automata', methods=['GET'])
+def grammar_automata(grammar_id):
+    """Every state, transition and table cell of a build as chunked JSON.
+
+    The body is compressed with the best of zstd and gzip that Accept-Encoding
+    allows; ?encoding= overrides the negotiation.
+    """
+    cached = find_build(grammar_id)
+    if cached is None:
+        return jsonify({'error': 'Grammar not built'}), 400
+
+    encoding = request.args.get('encoding') or request.accept_encodings.best_match(supported_encodings(), 'identity')
+    if encoding not in supported_encodings():
+        return jsonify({'error': f'Unsupported content encoding: {encoding}'}), 400
+
+    logger.info(f"[LOG grammar_automata_stream] ========= Streaming build {grammar_id[:12]} ({encoding})")
+    chunks = compress_chunks(stream_automata(cached), encoding)
+    response = app.response_class(stream_with_context(chunks), mimetype=app.json.mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+@app.route('/parse', methods=['POST'])
+def parse():
     data = request.json
-    input_str = data['input']
     try:
+        input_str = data['input']
+
+        # The grammar_id returned by /build_grammar, possibly from another worker process
+        grammar_id = data.get('grammar_id')
+        entry = registry.get(grammar_id) if isinstance(grammar_id, str) and grammar_id else None
+        if entry is None:
+            logger.warning("[LOG parse_error] ========= Parse attempted but grammar not built")
+            return jsonify({'error': 'Grammar not built'}), 400
+        grammar, tables, lexer = entry.grammar, entry.tables, entry.lexer
+
         logger.info(f"[LOG parse_start] ========= Starting parse for input: {input_str}")
-        tokens = tokenize(input_str, current_grammar.terminals)
-        logger.info(f"[LOG tokenize] ========= Tokenized input: {[str(t) for t in tokens]}")
-        
-        # Capture print output
-        old_stdout = sys.stdout
-        sys.stdout = buffer = io.StringIO()
-        success = parse_input(tokens, current_ACTION, current_GOTO, current_grammar)
-        output = buffer.getvalue()
-        sys.stdout = old_stdout
-
-        logger.info(f"[LOG parse_complete] ========= Parse completed: {'success' if success else 'failed'}")
-        return jsonify({'success': success, 'steps': output.strip().split('\n')})
+
+        # GLR explores every action of the conflicted cells and returns the parse forest
+        if data.get('glr'):
+            result = parse_glr(tables, lexer.token_ids(input_str))
+            response = serialize_parse_result(result, grammar)
+            if result.accepted:
+                response['forest'] = serialize_forest(result.forest, grammar)
+                if data.get('tree'):
+                    response['tree'] = serialize_tree(result.forest.first_tree(), grammar)
+            response['max_stacks'] = result.max_stacks
+            logger.info(f"[LOG parse_complete] ========= GLR parse completed: {'success' if result.accepted else 'failed'}")
+            return jsonify(response)
+
+        # Step traces and the tree are recorded in the same pass over the input
+        recorders = []
+        tracer = builder = None
+        # Step traces are only built when the visualizer asks for them
+        if data.get('trace', False):
+            tokens = list(lexer.token_ids(input_str))
+            tracer = TraceRecorder(grammar, tokens)
+            recorders.append(tracer)
+        else:
+            tokens = lexer.token_ids(input_str)
+        if data.get('tree'):
+            builder = TreeBuilder(tables)
+            recorders.append(builder)
+
+        if len(recorders) > 1:
+            def recorder(*event):
+                for r in recorders:
+                    r(*event)
+        else:
+            recorder = recorders[0] if recorders else None
+        result = parse_tokens(tables, tokens, recorder)
+        if tracer is not None:
+            result.steps = tracer.steps
+
+        response = serialize_parse_result(result, grammar)
+        if builder is not None and result.accepted:
+            response['tree'] = serialize_tree(builder.tree, grammar)
+
+        logger.info(f"[LOG parse_complete] ========= Parse completed: {'success' if result.accepted else 'failed'}")
+        return jsonify(response)
     except KeyError as e:
         logger.error(f"[LOG parse_error] ========= Missing required field: {e}")
         return jsonify({'error': f'Missing required field: {e}'}), 400
@@ -165,5 +701,80 @@ def parse():
         logger.error(f"[LOG parse_error] ========= Error parsing input: {e}")
         return jsonify({'error': str(e)}), 400
 
+@app.route('/parse_batch', methods=['POST'])
+def parse_batch_route():
+    data = request.json
+    try:
+        inputs = data['inputs']
+        entry = registry.get(data['grammar_id'])
+        if entry is None:
+            logger.warning("[LOG parse_batch_error] ========= Batch parse attempted but grammar not built")
+            return jsonify({'error': 'Grammar not built'}), 400
+
+        # Workers map the saved artifact when there is one instead of inheriting the tables
+        path = artifact_path(ARTIFACT_DIR, entry.grammar_id) if ARTIFACT_DIR else None
+        artifact = path if path and os.path.exists(path) else None
+
+        logger.info(f"[LOG parse_batch_start] ========= Starting batch parse of {len(inputs)} inputs")
+        results = parse_batch(entry.grammar, entry.tables, entry.lexer, inputs,
+                              trace=data.get('trace', False), artifact=artifact)
+        accepted = sum(result.accepted for result in results)
+        logger.info(f"[LOG parse_batch_complete] ========= Batch parse completed: {accepted}/{len(results)} accepted")
+        return jsonify({'results': [serialize_parse_result(result, entry.grammar) for result in results]})
+    except KeyError as e:
+        logger.error(f"[LOG parse_batch_error] ========= Missing required field: {e}")
+        return jsonify({'error': f'Missing required field: {e}'}), 400
+    except Exception as e:
+        logger.error(f"[LOG parse_batch_error] ========= Error parsing batch: {e}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/parse_edit', methods=['POST'])
+def parse_edit():
+    """Re-parse after an edit: {session_id, edit: {offset, deleted, inserted}}.
+
+    Without a known session_id, {grammar_id, input} starts a new session.
+    """
+    data = request.json
+    try:
+        with parse_sessions_lock:
+            session = parse_sessions.get(data.get('session_id'))
+            if session is not None:
+                parse_sessions.move_to_end(data['session_id'])
+
+        if session is None:
+            entry = registry.get(data['grammar_id'])
+            if entry is None:
+                logger.warning("[LOG parse_edit_error] ========= Parse attempted but grammar not built")
+                return jsonify({'error': 'Grammar not built'}), 400
+            session_id = uuid.uuid4().hex
+            parser = IncrementalParser(entry.tables, entry.lexer, data['input'])
+            with parse_sessions_lock:
+                parse_sessions[session_id] = (entry, parser, threading.Lock())
+                while len(parse_sessions) > MAX_PARSE_SESSIONS:
+                    parse_sessions.popitem(last=False)
+            logger.info(f"[LOG parse_edit_start] ========= Started parse session {session_id[:12]}")
+            result = parser.result
+        else:
+            session_id = data['session_id']
+            entry, parser, lock = session
+            edit = data['edit']
+            with lock:
+                result = parser.edit(edit['offset'], edit['deleted'], edit['inserted'])
+
+        logger.info(f"[LOG parse_complete] ========= Parse completed: {'success' if result.accepted else 'failed'}")
+        response = serialize_parse_result(result, entry.grammar)
+        response['session_id'] = session_id
+        return jsonify(response)
+    except KeyError as e:
+        logger.error(f"[LOG parse_edit_error] ========= Missing required field: {e}")
+        return jsonify({'error': f'Missing required field: {e}'}), 400
+    except Exception as e:
+        logger.error(f"[LOG parse_edit_error] ========= Error parsing edit: {e}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify(build_cache.stats())
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
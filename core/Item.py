@@ -2,7 +2,13 @@
 
 from core.grammar import Production, Terminal, NonTerminal
 
+# Lookahead ID of packed LR(0) items
+NO_LOOKAHEAD = -1
+
+
 class Item:
+    __slots__ = ('production', 'dot', 'lookahead')
+
     def __init__(self, production: Production, dot: int = 0, lookahead: Terminal = None):
         self.production = production
         self.dot = dot
@@ -40,3 +46,44 @@ class Item:
 
     def __repr__(self):
         return str(self)
+
+
+# --------------------------------------------------
+# PACKED ITEMS
+# --------------------------------------------------
+# Construction works on (prod_id, dot, la_id) tuples of grammar IDs;
+# Item objects are only built for display and serialization.
+
+def encode_item(item, grammar):
+    """Return the packed (prod_id, dot, la_id) tuple for an Item"""
+    la_id = grammar.symbol_ids[item.lookahead] if item.lookahead is not None else NO_LOOKAHEAD
+    return (grammar.production_ids[item.production], item.dot, la_id)
+
+
+def decode_item(packed, grammar):
+    """Return the Item for a packed (prod_id, dot, la_id) tuple"""
+    prod_id, dot, la_id = packed
+    lookahead = grammar.symbols[la_id] if la_id >= 0 else None
+    return Item(grammar.productions[prod_id], dot, lookahead)
+
+
+def decode_state(state, grammar):
+    """Return the set of Items for a state of packed items"""
+    return {decode_item(packed, grammar) for packed in state}
+
+
+def item_text(packed, grammar):
+    """Return str(decode_item(packed, grammar)) without building an Item.
+
+    The text of each (prod_id, dot) core is built once per grammar numbering.
+    """
+    prod_id, dot, la_id = packed
+    core = grammar.item_text_cache.get((prod_id, dot))
+    if core is None:
+        prod = grammar.productions[prod_id]
+        right = [str(sym) for sym in prod.right]
+        right.insert(dot, '•')
+        core = grammar.item_text_cache[(prod_id, dot)] = f"{prod.left} → {' '.join(right)}"
+    if la_id >= 0:
+        return f"[{core}, {grammar.symbols[la_id]}]"
+    return f"[{core}]"
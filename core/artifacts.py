@@ -0,0 +1,234 @@
+# core/artifacts.py
+
+from array import array
+from core.grammar import Grammar, NonTerminal, Terminal, Production
+from core.tables import ParseTables, Conflict
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# FILE FORMAT
+# --------------------------------------------------
+# <magic 8s> <version u32> <header length u32> <header JSON> <sections>
+#
+# The JSON header holds the grammar (symbols, productions, token classes),
+# the table dimensions, the table conflicts and, per section, its byte offset
+# and int count.
+# Sections are little-endian int32 arrays aligned to 8 bytes:
+#   action, goto, prod_left, prod_len    ParseTables arrays
+#   state_offsets                        n_states + 1 offsets into state_items
+#   state_items                          packed items as prod_id, dot, la_id triples
+#   transitions                          state_id, sym_id, target triples
+
+MAGIC = b'LRTABLE\x00'
+VERSION = 1
+EXTENSION = '.lrtbl'
+
+_PREFIX = struct.Struct('<8sII')
+_ALIGN = 8
+
+
+def artifact_path(directory, key):
+    return os.path.join(directory, key + EXTENSION)
+
+
+def _little_endian(arr):
+    if sys.byteorder == 'big':
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr
+
+
+# --------------------------------------------------
+# WRITE
+# --------------------------------------------------
+
+def save_artifact(directory, key, grammar, tables, states, transitions, token_classes=(), mode='clr'):
+    """Write a packed automaton and its ParseTables to directory/<key>.lrtbl.
+
+    mode names the construction (see core.modes) that produced the automaton.
+
+    The file is written under a temporary name and renamed into place, so
+    concurrent readers never see a partial artifact.
+    """
+    state_offsets = array('i', [0])
+    state_items = array('i')
+    for state in states:
+        for item in sorted(state):
+            state_items.extend(item)
+        state_offsets.append(len(state_items) // 3)
+
+    packed_transitions = array('i')
+    for (sid, sym_id), target in sorted(transitions.items()):
+        packed_transitions.extend((sid, sym_id, target))
+
+    sections = {
+        'action': array('i', tables.action),
+        'goto': array('i', tables.goto),
+        'prod_left': array('i', tables.prod_left),
+        'prod_len': array('i', tables.prod_len),
+        'state_offsets': state_offsets,
+        'state_items': state_items,
+        'transitions': packed_transitions,
+    }
+
+    header = {
+        'key': key,
+        'symbols': [[sym.name, isinstance(sym, Terminal)] for sym in grammar.symbols],
+        'start_symbol': grammar.start_symbol.name,
+        'prod_left': grammar.prod_left,
+        'prod_right': [list(right) for right in grammar.prod_right],
+        'token_classes': [list(c) for c in token_classes],
+        'mode': mode,
+        'precedence': [[assoc, [t.name for t in terms]] for assoc, terms in grammar.precedence],
+        'n_states': tables.n_states,
+        'n_terminals': tables.n_terminals,
+        'n_non_terminals': tables.n_non_terminals,
+        'conflicts': [list(conflict) for conflict in tables.conflicts.values()],
+        'sections': {},
+    }
+
+    # Offsets depend on the header length, which depends on the offsets;
+    # lay out the sections against a header padded to a fixed width
+    def layout(header_len):
+        offset = _PREFIX.size + header_len
+        for name, arr in sections.items():
+            offset = -(-offset // _ALIGN) * _ALIGN
+            header['sections'][name] = [offset, len(arr)]
+            offset += 4 * len(arr)
+
+    layout(0)
+    header_len = len(json.dumps(header).encode('utf-8'))
+    while True:
+        layout(header_len)
+        encoded = json.dumps(header).encode('utf-8')
+        if len(encoded) <= header_len:
+            encoded = encoded.ljust(header_len)
+            break
+        header_len = len(encoded)
+
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_PREFIX.pack(MAGIC, VERSION, header_len))
+            f.write(encoded)
+            for name, arr in sections.items():
+                offset = header['sections'][name][0]
+                f.write(b'\0' * (offset - f.tell()))
+                f.write(_little_endian(arr).tobytes())
+        path = artifact_path(directory, key)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    logger.info(f"[LOG artifact_saved] ========= Saved table artifact {path}")
+    return path
+
+
+# --------------------------------------------------
+# READ
+# --------------------------------------------------
+
+class TableArtifact:
+    """A loaded artifact: grammar and ParseTables, with arrays backed by the mapped file"""
+
+    def __init__(self, key, grammar, tables, token_classes, sections, mapping, mode='clr'):
+        self.key = key
+        self.grammar = grammar
+        self.tables = tables
+        self.token_classes = token_classes
+        self.mode = mode
+        self._sections = sections
+        self._mapping = mapping
+
+    def states(self):
+        """Return the packed states as frozensets of (prod_id, dot, la_id)"""
+        offsets = self._sections['state_offsets']
+        items = self._sections['state_items']
+        return [
+            frozenset(
+                (items[3 * i], items[3 * i + 1], items[3 * i + 2])
+                for i in range(offsets[sid], offsets[sid + 1])
+            )
+            for sid in range(len(offsets) - 1)
+        ]
+
+    def transitions(self):
+        """Return the packed transitions as {(state_id, sym_id): target}"""
+        flat = self._sections['transitions']
+        return {(flat[i], flat[i + 1]): flat[i + 2] for i in range(0, len(flat), 3)}
+
+
+def _grammar_from_header(header):
+    symbols = [Terminal(name) if is_terminal else NonTerminal(name) for name, is_terminal in header['symbols']]
+    productions = [
+        Production(symbols[left], [symbols[sym_id] for sym_id in right])
+        for left, right in zip(header['prod_left'], header['prod_right'])
+    ]
+    grammar = Grammar(NonTerminal(header['start_symbol']), productions)
+    grammar.terminals.update(sym for sym in symbols if isinstance(sym, Terminal))
+    grammar.set_precedence([
+        (assoc, [Terminal(name) for name in names]) for assoc, names in header.get('precedence', [])
+    ])
+    grammar.compute_first()
+
+    if grammar.symbols != symbols:
+        raise ValueError("Artifact symbol numbering does not match this version of the grammar code")
+    return grammar
+
+
+def _conflicts_from_header(header):
+    conflicts = {}
+    for state, terminal, kind, actions, items, chosen, resolved_by in header.get('conflicts', []):
+        conflicts[(state, terminal)] = Conflict(
+            state, terminal, kind, tuple(actions), tuple(map(tuple, items)), chosen, resolved_by,
+        )
+    return conflicts
+
+
+def load_artifact(path):
+    """Load an artifact written by save_artifact.
+
+    Table arrays are zero-copy views of a read-only memory map, so loading
+    costs a header parse and a FIRST computation, not an LR(1) build.
+    """
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, header_len = _PREFIX.unpack_from(mapping, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a table artifact")
+    if version != VERSION:
+        raise ValueError(f"{path} has artifact version {version}, expected {VERSION}")
+
+    header = json.loads(mapping[_PREFIX.size:_PREFIX.size + header_len])
+    view = memoryview(mapping)
+    sections = {}
+    for name, (offset, count) in header['sections'].items():
+        raw = view[offset:offset + 4 * count]
+        if sys.byteorder == 'little':
+            sections[name] = raw.cast('i')
+        else:
+            arr = array('i', raw.tobytes())
+            arr.byteswap()
+            sections[name] = arr
+
+    tables = ParseTables(
+        header['n_states'], header['n_terminals'], header['n_non_terminals'],
+        sections['action'], sections['goto'], sections['prod_left'], sections['prod_len'],
+        _conflicts_from_header(header),
+    )
+    grammar = _grammar_from_header(header)
+    token_classes = tuple(tuple(c) for c in header['token_classes'])
+
+    logger.info(f"[LOG artifact_loaded] ========= Loaded table artifact {path}: {tables.n_states} states")
+    return TableArtifact(header['key'], grammar, tables, token_classes, sections, mapping, header.get('mode', 'clr'))
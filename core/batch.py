@@ -0,0 +1,80 @@
+# core/batch.py
+
+from core.artifacts import load_artifact
+from core.lexer import compile_lexer
+from core.parser import parse_tokens, parse_with_trace
+from core.pools import shared_pool, shared_payload, load_payload, cached_state
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Below this many inputs a pool costs more than it saves
+MIN_PARALLEL_INPUTS = 64
+
+# --------------------------------------------------
+# WORKERS
+# --------------------------------------------------
+
+def _load_state(path, is_artifact):
+    """(grammar, tables, lexer) from an artifact or a shared_payload file.
+
+    Every worker memory-maps the same artifact, so the table pages are shared.
+    """
+    if is_artifact:
+        artifact = load_artifact(path)
+        return artifact.grammar, artifact.tables, compile_lexer(artifact.grammar, artifact.token_classes)
+    return load_payload(path)
+
+
+def _parse_one(state, text, trace):
+    grammar, tables, lexer = state
+    if trace:
+        return parse_with_trace(tables, list(lexer.token_ids(text)), grammar)
+    return parse_tokens(tables, lexer.token_ids(text))
+
+
+def _parse_chunk(args):
+    key, path, is_artifact, texts, trace = args
+    state = cached_state(key, lambda: _load_state(path, is_artifact))
+    return [_parse_one(state, text, trace) for text in texts]
+
+
+# --------------------------------------------------
+# BATCH ENTRY POINT
+# --------------------------------------------------
+
+def parse_batch(grammar, tables, lexer, inputs, trace=False, workers=None, artifact=None):
+    """Tokenize and parse many input strings against one grammar.
+
+    Returns ParseResults in input order. Large batches are split into chunks
+    and parsed in the process's shared pool (see shared_pool). Each worker
+    loads a grammar once and keeps it for later batches: with an artifact
+    path (see save_artifact) it memory-maps that file, otherwise it
+    unpickles the grammar, tables and lexer from a file written once per
+    grammar (see shared_payload). Small batches are parsed in this process.
+    """
+    inputs = list(inputs)
+    workers = workers or os.cpu_count() or 1
+
+    if len(inputs) < MIN_PARALLEL_INPUTS or workers < 2:
+        state = (grammar, tables, lexer)
+        return [_parse_one(state, text, trace) for text in inputs]
+
+    if artifact is not None:
+        key, path = artifact, artifact
+    else:
+        key, path = shared_payload((grammar, tables, lexer))
+
+    chunk_size = max(1, len(inputs) // (workers * 4))
+    chunks = [
+        (key, path, artifact is not None, inputs[i:i + chunk_size], trace)
+        for i in range(0, len(inputs), chunk_size)
+    ]
+
+    logger.info(f"[LOG parse_batch] ========= Parsing {len(inputs)} inputs in {len(chunks)} chunks on {workers} workers")
+
+    results = []
+    for chunk_results in shared_pool(workers).imap(_parse_chunk, chunks):
+        results.extend(chunk_results)
+    return results
@@ -0,0 +1,181 @@
+# core/build_cache.py
+
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# GRAMMAR KEYS
+# --------------------------------------------------
+
+def grammar_key(grammar, token_classes=(), mode='clr'):
+    """Content hash of a built grammar.
+
+    Covers the start symbol, the productions in order (after alternatives and
+    whitespace have been normalized by parsing), the terminal and
+    non-terminal sets, the precedence declarations, the lexer's token
+    classes and the construction mode, so equal grammars
+    submitted with different formatting share a key.
+    """
+    canonical = {
+        'start_symbol': str(grammar.start_symbol),
+        'productions': [
+            [str(prod.left), [str(sym) for sym in prod.right]]
+            for prod in grammar.productions
+        ],
+        'terminals': sorted(str(t) for t in grammar.terminals),
+        'non_terminals': sorted(str(nt) for nt in grammar.non_terminals),
+        'token_classes': [list(c) for c in token_classes],
+    }
+    # Only present when declared, so grammars without precedence keep their keys
+    if grammar.precedence:
+        canonical['precedence'] = [[assoc, [str(t) for t in terms]] for assoc, terms in grammar.precedence]
+    if mode != 'clr':
+        canonical['mode'] = mode
+    encoded = json.dumps(canonical, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+# --------------------------------------------------
+# AUTOMATA
+# --------------------------------------------------
+
+# Rough bytes per packed item held in a state frozenset
+ITEM_BYTES = 100
+
+
+class BuiltAutomata:
+    """The packed automata of a build, kept for paged serialization.
+
+    automata maps names to packed (states, transitions): 'clr' and 'lalr' for
+    canonical builds (see build_CLR_and_LALR_automata), otherwise the name
+    of the construction mode (see core.modes).
+    """
+
+    def __init__(self, grammar, automata):
+        self.grammar = grammar
+        self.automata = automata
+        self._by_source = {}
+        self.size = ITEM_BYTES * sum(
+            sum(map(len, states)) + len(transitions)
+            for states, transitions in self.automata.values()
+        )
+
+    def states(self, name):
+        return self.automata[name][0]
+
+    def transitions(self, name):
+        return self.automata[name][1]
+
+    def transitions_from(self, name, start, stop):
+        """Return [(state_id, sym_id, target)] for source states start..stop-1, ordered"""
+        by_source = self._by_source.get(name)
+        if by_source is None:
+            by_source = [[] for _ in self.states(name)]
+            for (sid, sym_id), target in self.transitions(name).items():
+                by_source[sid].append((sym_id, target))
+            for edges in by_source:
+                edges.sort()
+            self._by_source[name] = by_source
+        return [
+            (sid, sym_id, target)
+            for sid in range(start, min(stop, len(by_source)))
+            for sym_id, target in by_source[sid]
+        ]
+
+
+# --------------------------------------------------
+# CACHE
+# --------------------------------------------------
+
+class CachedBuild:
+    """A GrammarEntry together with its build summary response and, optionally, its BuiltAutomata"""
+
+    def __init__(self, entry, body: bytes, automata=None):
+        self.key = entry.grammar_id
+        self.entry = entry
+        self.body = body
+        self.automata = automata
+        # Derived results, computed on first request, each under its own lock
+        # so a slow mode comparison does not hold up table compression
+        # {mode: ModeReport} once /grammar/<id>/modes has compared the modes
+        self.mode_reports = None
+        self.mode_reports_lock = threading.Lock()
+        # CompressedTables once /grammar/<id>/tables/packed has been asked for
+        self.compressed = None
+        self.compressed_lock = threading.Lock()
+        # Approximate footprint: response body, table arrays and packed automata
+        tables = entry.tables
+        self.size = len(body) + sum(
+            arr.itemsize * len(arr)
+            for arr in (tables.action, tables.goto, tables.prod_left, tables.prod_len)
+        ) + (automata.size if automata is not None else 0)
+
+
+class BuildCache:
+    """Thread-safe LRU of CachedBuild entries bounded by entry count and total size"""
+
+    def __init__(self, max_entries=128, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Lookups by the grammar registry's loader, counted apart from builds
+        self.loader_hits = 0
+        self.loader_misses = 0
+
+    def get(self, key, loader=False):
+        """The CachedBuild under key, or None; loader lookups go to the loader_* counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if loader:
+                    self.loader_misses += 1
+                else:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if loader:
+                self.loader_hits += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, entry):
+        if entry.size > self.max_bytes:
+            logger.info(f"[LOG build_cache_skip] ========= Build of {entry.size} bytes exceeds cache budget")
+            return
+
+        with self._lock:
+            old = self._entries.pop(entry.key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[entry.key] = entry
+            self._bytes += entry.size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'loader_hits': self.loader_hits,
+                'loader_misses': self.loader_misses,
+            }
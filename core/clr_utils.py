@@ -1,7 +1,10 @@
 # core/clr_utils.py
 
-from core.Item import Item
-from core.grammar import NonTerminal, Terminal
+from core.Item import encode_item, decode_state
+from core.tables import build_encoded_tables, decode_tables
+from core.grammar import NonTerminal, Terminal, bit_ids
+from core.lexer import Lexer, UNKNOWN
+from functools import lru_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,42 +13,66 @@ logger = logging.getLogger(__name__)
 # CLOSURE (LR(1))
 # --------------------------------------------------
 
-def closure(items: set, grammar):
-    closure_set = set(items)
-    added = True
-
-    while added:
-        added = False
-        new_items = set()
-
-        for item in closure_set:
-            next_sym = item.next_symbol()
-            if isinstance(next_sym, NonTerminal):
-                for prod in grammar.productions:
-                    if prod.left == next_sym:
-                        beta = item.production.right[item.dot + 1:]
-                        beta_lookahead = beta + [item.lookahead]
-                        first_set = compute_first_sequence(grammar, beta_lookahead)
+def closure_ids(kernel, grammar):
+    """Return the LR(1) closure of a kernel of packed (prod_id, dot, la_id) items.
+
+    Lookaheads are tracked as one bitset per (prod_id, dot) core and pushed
+    along a worklist, expanding only the productions of the non-terminal after
+    the dot. Results are memoized per kernel.
+    """
+    kernel = frozenset(kernel)
+    cached = grammar.closure_cache.get(kernel)
+    if cached is not None:
+        return cached
+
+    prod_right = grammar.prod_right
+    prod_ids_by_left = grammar.prod_ids_by_left
+    n_terminals = grammar.n_terminals
+
+    # Lookahead bitset per (prod_id, dot) core; a core is revisited whenever its set grows
+    lookaheads = {}
+    for prod_id, dot, la in kernel:
+        lookaheads[(prod_id, dot)] = lookaheads.get((prod_id, dot), 0) | (1 << la)
+    worklist = list(lookaheads)
+
+    while worklist:
+        core = worklist.pop()
+        prod_id, dot = core
+        right = prod_right[prod_id]
+        if dot >= len(right) or right[dot] < n_terminals:
+            continue
 
-                        for la in first_set:
-                            new_item = Item(prod, 0, la)
-                            if new_item not in closure_set:
-                                new_items.add(new_item)
+        first_beta, beta_nullable = grammar.first_of_suffix(prod_id, dot + 1)
+        new_las = first_beta | lookaheads[core] if beta_nullable else first_beta
+
+        for new_prod in prod_ids_by_left[right[dot]]:
+            new_core = (new_prod, 0)
+            old_las = lookaheads.get(new_core, 0)
+            if old_las | new_las != old_las:
+                lookaheads[new_core] = old_las | new_las
+                worklist.append(new_core)
+
+    result = frozenset(
+        (prod_id, dot, la)
+        for (prod_id, dot), las in lookaheads.items()
+        for la in bit_ids(las)
+    )
+    grammar.closure_cache[kernel] = result
+    return result
 
-        if new_items:
-            closure_set |= new_items
-            added = True
 
-    return closure_set
+def closure(items: set, grammar):
+    """Return the LR(1) closure of a set of Items"""
+    kernel = {encode_item(item, grammar) for item in items}
+    return frozenset(decode_state(closure_ids(kernel, grammar), grammar))
 
 
 def compute_first_sequence(grammar, symbols):
-    result = set()
-    for sym in symbols:
-        result |= grammar.first[sym] - {'ε'}
-        if 'ε' not in grammar.first[sym]:
-            return result
-    result.add('ε')
+    ids = (grammar.symbol_ids[sym] for sym in symbols)
+    bits, nullable = grammar.first_of_sequence(ids)
+    result = {grammar.symbols[t] for t in bit_ids(bits)}
+    if nullable:
+        result.add('ε')
     return result
 
 
@@ -61,39 +88,185 @@ def goto(items, symbol, grammar):
     return closure(moved, grammar)
 
 
+def goto_kernels(state, grammar):
+    """Group the packed items of a state by the symbol after the dot.
+
+    Returns {sym_id: kernel}, where kernel holds the items with the dot moved
+    past sym_id.
+    """
+    prod_right = grammar.prod_right
+    moved = {}
+    for prod_id, dot, la in state:
+        right = prod_right[prod_id]
+        if dot < len(right):
+            moved.setdefault(right[dot], []).append((prod_id, dot + 1, la))
+    return moved
+
+
 # --------------------------------------------------
 # BUILD CANONICAL LR(1) STATES
 # --------------------------------------------------
 
-def build_LR1_states(grammar):
-    start_prod = grammar.productions[0]
-    start_item = Item(start_prod, 0, Terminal('$'))
-    start_state = closure({start_item}, grammar)
+def build_LR1_automaton(grammar, progress=None):
+    """Build the canonical LR(1) collection over packed items.
 
-    states = [start_state]
-    state_ids = {frozenset(start_state): 0}
+    Returns (states, transitions): states are frozensets of packed items and
+    transitions map (state_id, sym_id) to the target state id. States are
+    numbered breadth-first, visiting goto symbols in ID order. progress, a
+    core.jobs.BuildProgress, is updated before each state is expanded and
+    may abort the build.
+    """
+    start_kernel = frozenset({(0, 0, grammar.end_id)})
+
+    states = [closure_ids(start_kernel, grammar)]
+    state_ids = {start_kernel: 0}
     transitions = {}
 
     i = 0
     while i < len(states):
-        state = states[i]
-        symbols = {item.next_symbol() for item in state if item.next_symbol()}
+        if progress is not None:
+            progress.update(len(states), len(states) - i)
+        moved = goto_kernels(states[i], grammar)
+
+        for sym_id in sorted(moved):
+            kernel = frozenset(moved[sym_id])
+            target = state_ids.get(kernel)
+            if target is None:
+                target = state_ids[kernel] = len(states)
+                states.append(closure_ids(kernel, grammar))
+            transitions[(i, sym_id)] = target
+
+        i += 1
 
-        for sym in symbols:
-            next_state = goto(state, sym, grammar)
-            fs = frozenset(next_state)
+    return states, transitions
 
-            if fs not in state_ids:
-                state_ids[fs] = len(states)
-                states.append(next_state)
 
-            transitions[(i, sym)] = state_ids[fs]
+def rebuild_LR1_automaton(grammar, previous, previous_states, previous_transitions, progress=None):
+    """Build the canonical LR(1) collection of grammar, reusing a previous build.
+
+    previous is an earlier version of the grammar and previous_states and
+    previous_transitions its build_LR1_automaton result; grammar must have
+    had compute_first(previous) called. A previous state with no item of a
+    removed production or lookahead, and none whose RHS has a non-terminal in
+    grammar.changed_symbols, expands the same productions with the same
+    lookaheads under the new grammar, so it is translated to the new
+    numbering instead of being recomputed.
+    Only the other states get a fresh closure and goto. States are numbered
+    exactly as build_LR1_automaton would number them; progress is updated as
+    there.
+    """
+    changed = grammar.changed_symbols
+    if changed is None:
+        raise ValueError("compute_first(previous) must be called before rebuilding")
+
+    # Previous symbol and production IDs in the new numbering (-1 if gone)
+    sym_map = [grammar.symbol_ids.get(sym, -1) for sym in previous.symbols]
+    new_prods = {}
+    for prod_id, (left, right) in enumerate(zip(grammar.prod_left, grammar.prod_right)):
+        new_prods.setdefault((left, right), []).append(prod_id)
+    prod_map = []
+    for left, right in zip(previous.prod_left, previous.prod_right):
+        key = (sym_map[left], tuple(sym_map[sym_id] for sym_id in right))
+        candidates = new_prods.get(key)
+        prod_map.append(candidates.pop(0) if candidates else -1)
+
+    # Every item the previous grammar can form, mapped to the new numbering
+    # (None for removed productions), so whole states translate and test at
+    # C speed through set operations instead of a Python loop per item
+    old_terminals = range(previous.n_terminals)
+    item_map = {}
+    dirty_items = set()
+    kernel_items = set()
+    for prod_id, right in enumerate(previous.prod_right):
+        new_id = prod_map[prod_id]
+        clean = new_id >= 0 and changed.isdisjoint(grammar.prod_right[new_id])
+        for dot in range(len(right) + 1):
+            for la in old_terminals:
+                item = (prod_id, dot, la)
+                kept = new_id >= 0 and sym_map[la] >= 0
+                item_map[item] = (new_id, dot, sym_map[la]) if kept else None
+                if not (clean and kept):
+                    dirty_items.add(item)
+                if dot > 0 or prod_id == 0:
+                    kernel_items.add(item)
+    translate_item = item_map.__getitem__
+
+    # Kernels of the previous states, so that freshly computed gotos can land on them
+    old_kernels = [state & kernel_items for state in previous_states]
+    old_by_kernel = {}
+    for old_id, kernel in enumerate(old_kernels):
+        translated = frozenset(map(translate_item, kernel))
+        if None not in translated:
+            old_by_kernel[translated] = old_id
+
+    old_out = [[] for _ in previous_states]
+    for (old_id, sym_id), target in previous_transitions.items():
+        old_out[old_id].append((sym_map[sym_id], target))
+
+    start_kernel = frozenset({(0, 0, grammar.end_id)})
+    states = []
+    origins = []      # per new state: previous state ID or its fresh kernel
+    old_to_new = {}
+    state_ids = {}
+    transitions = {}
+    reused = 0
+
+    def discover(kernel, old_id):
+        if old_id is not None:
+            target = old_to_new.get(old_id)
+            if target is None:
+                target = old_to_new[old_id] = len(origins)
+                origins.append(old_id)
+            return target
+        target = state_ids.get(kernel)
+        if target is None:
+            target = state_ids[kernel] = len(origins)
+            origins.append(kernel)
+        return target
+
+    discover(start_kernel, old_by_kernel.get(start_kernel))
 
+    i = 0
+    while i < len(origins):
+        if progress is not None:
+            progress.update(len(origins), len(origins) - i)
+        origin = origins[i]
+        if isinstance(origin, int) and previous_states[origin].isdisjoint(dirty_items):
+            states.append(frozenset(map(translate_item, previous_states[origin])))
+            for sym_id, target in sorted(old_out[origin]):
+                transitions[(i, sym_id)] = discover(None, target)
+            reused += 1
+        else:
+            if isinstance(origin, int):
+                kernel = frozenset(map(translate_item, old_kernels[origin]))
+            else:
+                kernel = origin
+            state = closure_ids(kernel, grammar)
+            states.append(state)
+            moved = goto_kernels(state, grammar)
+            for sym_id in sorted(moved):
+                kernel = frozenset(moved[sym_id])
+                transitions[(i, sym_id)] = discover(kernel, old_by_kernel.get(kernel))
         i += 1
 
+    logger.info(f"[LOG lr1_rebuild] ========= Rebuilt LR(1) states: reused {reused} of {len(states)}")
     return states, transitions
 
 
+def decode_automaton(states, transitions, grammar):
+    """Convert packed states and transitions to Item sets keyed by Symbol"""
+    symbols = grammar.symbols
+    return (
+        [decode_state(state, grammar) for state in states],
+        {(sid, symbols[sym_id]): target for (sid, sym_id), target in transitions.items()},
+    )
+
+
+def build_LR1_states(grammar):
+    states, transitions = build_LR1_automaton(grammar)
+    return decode_automaton(states, transitions, grammar)
+
+
 # --------------------------------------------------
 # PUBLIC ENTRY POINT
 # --------------------------------------------------
@@ -110,25 +283,15 @@ def build_CLR_states(grammar):
 # --------------------------------------------------
 
 def build_parsing_tables(states, transitions, grammar):
-    ACTION = {}
-    GOTO = {}
-
-    for sid, state in enumerate(states):
-        for item in state:
-            if item.is_complete():
-                if item.production.left == grammar.start_symbol:
-                    ACTION[(sid, Terminal('$'))] = 'ACC'
-                else:
-                    ACTION[(sid, item.lookahead)] = f"R({item.production})"
-            else:
-                sym = item.next_symbol()
-                target = transitions.get((sid, sym))
-                if isinstance(sym, Terminal) and target is not None:
-                    ACTION[(sid, sym)] = f"S({target})"
-                elif isinstance(sym, NonTerminal) and target is not None:
-                    GOTO[(sid, sym)] = target
+    """Return (ACTION, GOTO) string tables for LR(1) or LALR(1) Item states.
 
-    return ACTION, GOTO
+    Built through build_encoded_tables, so conflicts are resolved the same
+    deterministic way and logged rather than left to set iteration order.
+    """
+    packed_states = [{encode_item(item, grammar) for item in state} for state in states]
+    packed_transitions = {(sid, grammar.symbol_ids[sym]): target for (sid, sym), target in transitions.items()}
+    tables = build_encoded_tables(packed_states, packed_transitions, grammar)
+    return decode_tables(tables, grammar)
 
 
 # --------------------------------------------------
@@ -195,35 +358,16 @@ def parse_input(tokens, ACTION, GOTO, grammar):
 # --------------------------------------------------
 
 def tokenize(input_string, terminals):
-    tokens = []
-    i = 0
-    terminal_strings = sorted([str(t) for t in terminals], key=len, reverse=True)
-
-    while i < len(input_string):
-        if input_string[i].isspace():
-            i += 1
-            continue
-
-        if input_string[i].isalpha():
-            j = i
-            while j < len(input_string) and input_string[j].isalnum():
-                j += 1
-            tokens.append(Terminal("id"))
-            i = j
-            continue
-
-        matched = False
-        for t in terminal_strings:
-            if input_string.startswith(t, i):
-                tokens.append(Terminal(t))
-                i += len(t)
-                matched = True
-                break
-
-        if not matched:
-            logger.warning(f"[LOG tokenize_warning] ========= Unknown character '{input_string[i]}', treating as terminal")
-            tokens.append(Terminal(input_string[i]))
-            i += 1
-
-    tokens.append(Terminal("$"))
-    return tokens
+    """Tokenize a whole string into Terminals, ending with '$'"""
+    lexer, names = _terminal_lexer(frozenset(str(t) for t in terminals))
+    return [
+        Terminal(text) if term_id == UNKNOWN else Terminal(names[term_id])
+        for term_id, text, _ in lexer.tokens(input_string)
+    ]
+
+
+@lru_cache(maxsize=64)
+def _terminal_lexer(names):
+    names = sorted(names | {'$'})
+    lexer = Lexer({name: i for i, name in enumerate(names)}, names.index('$'))
+    return lexer, names
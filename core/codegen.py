@@ -0,0 +1,201 @@
+# core/codegen.py
+
+from array import array
+import re
+import sys
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# TABLE LITERALS
+# --------------------------------------------------
+
+def _packed_ints(arr):
+    """zlib-compressed little-endian int32 bytes of an int array"""
+    ints = array('i', arr)
+    if sys.byteorder == 'big':
+        ints.byteswap()
+    return zlib.compress(ints.tobytes(), 9)
+
+
+def _bytes_literal(data, width=48):
+    """data as a parenthesized run of bytes literals of width bytes each"""
+    lines = [f"    {data[i:i + width]!r}" for i in range(0, len(data), width)]
+    return '(\n' + '\n'.join(lines or ["    b''"]) + '\n)'
+
+
+# --------------------------------------------------
+# MODULE TEMPLATE
+# --------------------------------------------------
+
+_TEMPLATE = '''\
+"""Standalone LR parser for the grammar with start symbol {start!r}.
+
+Generated from its parsing tables; depends on the standard library only.
+tokens(text) yields (term_id, text, start) tuples ending with '$',
+parse(text, actions=None) returns the value of the start symbol or raises
+ParseError. actions maps production IDs to callables taking the list of
+child values; productions without one take the value of their first child
+(None for an empty production) and a token's value is its text.
+"""
+
+from array import array
+import re
+import sys
+import zlib
+
+TERMINALS = {terminals!r}
+NON_TERMINALS = {non_terminals!r}
+PRODUCTIONS = {productions!r}
+END = {end_id!r}
+N_STATES = {n_states!r}
+N_TERMINALS = {n_terminals!r}
+N_NON_TERMINALS = {n_non_terminals!r}
+
+
+def _ints(data):
+    ints = array('i')
+    ints.frombytes(zlib.decompress(data))
+    if sys.byteorder == 'big':
+        ints.byteswap()
+    return ints
+
+
+# ACTION cells: 0 error, s + 1 shift to s, -(p + 1) reduce by p, -1 accept
+_ACTION = _ints{action}
+_GOTO = _ints{goto}
+_PROD_LEFT = _ints{prod_left}
+_PROD_LEN = _ints{prod_len}
+
+# --------------------------------------------------
+# TOKENIZER
+# --------------------------------------------------
+
+_WHITESPACE = re.compile(r'\\s+')
+_LITERAL_RE = {literal_re}
+_LITERALS = {literals!r}
+_CLASSES = [(term_id, re.compile(pattern)) for term_id, pattern in {classes!r}]
+
+
+def tokens(text):
+    """Yield the longest-match tokens of text, ending with the '$' token; unknown characters get ID -1"""
+    pos, length = 0, len(text)
+    while True:
+        m = _WHITESPACE.match(text, pos)
+        if m:
+            pos = m.end()
+        if pos >= length:
+            break
+
+        best_id, best_end = -1, pos + 1
+        if _LITERAL_RE is not None:
+            m = _LITERAL_RE.match(text, pos)
+            if m:
+                best_id, best_end = _LITERALS[m.group()], m.end()
+        for term_id, regex in _CLASSES:
+            m = regex.match(text, pos)
+            if m and (m.end() > best_end or best_id == -1 and m.end() > pos):
+                best_id, best_end = _LITERALS.get(m.group(), term_id), m.end()
+
+        yield best_id, text[pos:best_end], pos
+        pos = best_end
+    yield END, '$', length
+
+
+# --------------------------------------------------
+# DRIVER
+# --------------------------------------------------
+
+class ParseError(SyntaxError):
+    def __init__(self, message, state, term_id, offset):
+        super().__init__(message)
+        self.state = state
+        self.term_id = term_id
+        self.offset = offset
+
+
+def parse(text, actions=None):
+    """Parse text and return the value of its start symbol"""
+    action, goto, prod_left, prod_len = _ACTION, _GOTO, _PROD_LEFT, _PROD_LEN
+    n_terminals, n_non_terminals = N_TERMINALS, N_NON_TERMINALS
+    actions = actions or {{}}
+
+    stack = [0]
+    values = [None]
+    stream = tokens(text)
+    token, lexeme, start = next(stream)
+
+    while True:
+        state = stack[-1]
+        code = action[state * n_terminals + token] if token >= 0 else 0
+
+        if code > 0:
+            stack.append(code - 1)
+            values.append(lexeme)
+            token, lexeme, start = next(stream)
+
+        elif code < -1:
+            prod_id = -code - 1
+            rhs_len = prod_len[prod_id]
+            if rhs_len:
+                children = values[-rhs_len:]
+                del stack[-rhs_len:]
+                del values[-rhs_len:]
+            else:
+                children = []
+            hook = actions.get(prod_id)
+            value = hook(children) if hook is not None else (children[0] if children else None)
+            stack.append(goto[stack[-1] * n_non_terminals + prod_left[prod_id]])
+            values.append(value)
+
+        elif code == -1:
+            return values[-1]
+
+        else:
+            name = TERMINALS[token] if token >= 0 else repr(lexeme)
+            raise ParseError(f"Unexpected {{name}} at offset {{start}} (state {{state}})", state, token, start)
+'''
+
+
+# --------------------------------------------------
+# GENERATOR
+# --------------------------------------------------
+
+def generate_parser_module(grammar, tables, lexer):
+    """Return the source of a Python module parsing with tables and lexer.
+
+    The module holds the ACTION/GOTO arrays as zlib-compressed bytes
+    literals, the lexer's regexes and a driver equivalent to parse_tokens
+    that also computes semantic values, and imports nothing from core, so
+    it loads without building anything.
+    """
+    symbols = grammar.symbols
+    n_terminals = grammar.n_terminals
+    literal_names = sorted(lexer.literals, key=len, reverse=True)
+    literal_re = (
+        f"re.compile({'|'.join(map(re.escape, literal_names))!r})"
+        if literal_names else 'None'
+    )
+
+    source = _TEMPLATE.format(
+        start=str(grammar.productions[0].right[0]),
+        terminals=tuple(symbols[t].name for t in range(n_terminals)),
+        non_terminals=tuple(str(sym) for sym in symbols[n_terminals:]),
+        productions=tuple(str(prod) for prod in grammar.productions),
+        end_id=grammar.end_id,
+        n_states=tables.n_states,
+        n_terminals=tables.n_terminals,
+        n_non_terminals=tables.n_non_terminals,
+        action=_bytes_literal(_packed_ints(tables.action)),
+        goto=_bytes_literal(_packed_ints(tables.goto)),
+        prod_left=_bytes_literal(_packed_ints(tables.prod_left)),
+        prod_len=_bytes_literal(_packed_ints(tables.prod_len)),
+        literal_re=literal_re,
+        literals=lexer.literals,
+        classes=[(term_id, regex.pattern) for term_id, regex in lexer.classes],
+    )
+    logger.info(f"[LOG parser_generated] ========= Generated parser module: {len(source)} characters, "
+                f"{tables.n_states} states")
+    return source
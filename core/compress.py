@@ -0,0 +1,193 @@
+# core/compress.py
+
+from array import array
+from collections import Counter
+from core.tables import ERROR, ACCEPT
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# ROW DISPLACEMENT
+# --------------------------------------------------
+
+def _displace(rows):
+    """Pack sparse rows into one vector by row displacement (comb packing).
+
+    rows is a list of [(column, value)]. Rows are placed densest first at
+    the lowest base where none of their columns collide with an earlier row.
+    Returns (base, value, check): row r's entry for column c is at
+    base[r] + c, and check holds r there.
+    """
+    base = array('i', [0]) * len(rows)
+    value = array('i')
+    check = array('i')
+    used = bytearray()
+    lowest_free = 0
+
+    for r in sorted(range(len(rows)), key=lambda r: (-len(rows[r]), r)):
+        entries = rows[r]
+        if not entries:
+            continue
+        first = entries[0][0]
+        b = max(lowest_free - first, 0)
+        while any(b + c < len(used) and used[b + c] for c, _ in entries):
+            b += 1
+        base[r] = b
+
+        end = b + entries[-1][0] + 1
+        if end > len(used):
+            grow = end - len(used)
+            used.extend(bytes(grow))
+            value.extend([ERROR] * grow)
+            check.extend([-1] * grow)
+        for c, v in entries:
+            used[b + c] = 1
+            value[b + c] = v
+            check[b + c] = r
+        while lowest_free < len(used) and used[lowest_free]:
+            lowest_free += 1
+
+    return base, value, check
+
+
+# --------------------------------------------------
+# COMPRESSED TABLES
+# --------------------------------------------------
+
+class _FlatView:
+    """Read-only row-major view of a compressed table, indexed like ParseTables.action/goto"""
+    __slots__ = ('_lookup', '_width', '_length')
+
+    def __init__(self, lookup, width, height):
+        self._lookup = lookup
+        self._width = width
+        self._length = width * height
+
+    def __getitem__(self, index):
+        row, column = divmod(index, self._width)
+        return self._lookup(row, column)
+
+    def __len__(self):
+        return self._length
+
+
+class CompressedTables:
+    """ParseTables packed with default reductions, shared rows and row displacement.
+
+    ACTION: each state has a default reduction (its most common reduce, or
+    ERROR) that stands for every cell not stored explicitly, so a state
+    detects some errors only after reducing, as in yacc. States with
+    identical explicit entries share a row, and the rows are packed into
+    action_value/action_check. GOTO is packed per non-terminal the same way,
+    with the most common target as the default. action_at and goto_at answer
+    like the dense tables', and action/goto are flat views of them, so
+    parse_tokens, PushParser, parse_tree and parse_glr all accept
+    CompressedTables in place of ParseTables. Each lookup then costs a
+    method call, so the dense arrays stay the faster choice in memory.
+    """
+
+    def __init__(self, tables, action_default, action_row, action_base, action_value, action_check,
+                 goto_default, goto_base, goto_value, goto_check):
+        self.n_states = tables.n_states
+        self.n_terminals = tables.n_terminals
+        self.n_non_terminals = tables.n_non_terminals
+        self.prod_left = tables.prod_left
+        self.prod_len = tables.prod_len
+        self.conflicts = tables.conflicts
+        self.action_default = action_default
+        self.action_row = action_row
+        self.action_base = action_base
+        self.action_value = action_value
+        self.action_check = action_check
+        self.goto_default = goto_default
+        self.goto_base = goto_base
+        self.goto_value = goto_value
+        self.goto_check = goto_check
+        self.action = _FlatView(self.action_at, self.n_terminals, self.n_states)
+        self.goto = _FlatView(self.goto_at, self.n_non_terminals, self.n_states)
+
+    def action_at(self, state, term_id):
+        row = self.action_row[state]
+        i = self.action_base[row] + term_id
+        if i < len(self.action_check) and self.action_check[i] == row:
+            return self.action_value[i]
+        return self.action_default[state]
+
+    def goto_at(self, state, nt_index):
+        i = self.goto_base[nt_index] + state
+        if i < len(self.goto_check) and self.goto_check[i] == nt_index:
+            return self.goto_value[i]
+        return self.goto_default[nt_index]
+
+    def arrays(self):
+        return {
+            'action_default': self.action_default,
+            'action_row': self.action_row,
+            'action_base': self.action_base,
+            'action_value': self.action_value,
+            'action_check': self.action_check,
+            'goto_default': self.goto_default,
+            'goto_base': self.goto_base,
+            'goto_value': self.goto_value,
+            'goto_check': self.goto_check,
+        }
+
+    def report(self):
+        """Sizes of the dense and compressed tables, in ints"""
+        dense = self.n_states * (self.n_terminals + self.n_non_terminals)
+        compressed = sum(len(arr) for arr in self.arrays().values())
+        return {
+            'dense_cells': dense,
+            'compressed_cells': compressed,
+            'ratio': round(dense / compressed, 3) if compressed else None,
+            'action_rows': len(self.action_base),
+            'bytes': 4 * compressed,
+        }
+
+
+def compress_tables(tables):
+    """Return CompressedTables for a ParseTables"""
+    n_states, n_terminals, n_non_terminals = tables.n_states, tables.n_terminals, tables.n_non_terminals
+
+    # Cells deliberately left as errors by nonassoc precedence must stay errors
+    explicit_errors = {key for key, conflict in tables.conflicts.items() if conflict.chosen == ERROR}
+
+    action_default = array('i', [ERROR]) * n_states
+    action_row = array('i', [0]) * n_states
+    row_ids = {}
+    rows = []
+    for state in range(n_states):
+        cells = [tables.action_at(state, t) for t in range(n_terminals)]
+        reduces = Counter(code for code in cells if code < ACCEPT)
+        default = reduces.most_common(1)[0][0] if reduces else ERROR
+        entries = tuple(
+            (t, code) for t, code in enumerate(cells)
+            if code != default and (code != ERROR or (state, t) in explicit_errors)
+        )
+        action_default[state] = default
+        row = row_ids.get(entries)
+        if row is None:
+            row = row_ids[entries] = len(rows)
+            rows.append(entries)
+        action_row[state] = row
+    action_base, action_value, action_check = _displace(rows)
+
+    goto_default = array('i', [-1]) * n_non_terminals
+    goto_rows = []
+    for nt_index in range(n_non_terminals):
+        targets = [tables.goto_at(state, nt_index) for state in range(n_states)]
+        used = Counter(target for target in targets if target >= 0)
+        default = used.most_common(1)[0][0] if used else -1
+        goto_default[nt_index] = default
+        goto_rows.append([(state, target) for state, target in enumerate(targets) if target >= 0 and target != default])
+    goto_base, goto_value, goto_check = _displace(goto_rows)
+
+    compressed = CompressedTables(
+        tables, action_default, action_row, action_base, action_value, action_check,
+        goto_default, goto_base, goto_value, goto_check,
+    )
+    report = compressed.report()
+    logger.info(f"[LOG tables_compressed] ========= Compressed tables {report['dense_cells']} -> "
+                f"{report['compressed_cells']} cells ({len(rows)} distinct action rows)")
+    return compressed
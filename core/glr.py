@@ -0,0 +1,288 @@
+# core/glr.py
+
+from collections import deque
+from core.tables import ERROR, ACCEPT, BY_DEFAULT
+from core.parser import ParseResult, token_name
+from core.tree import ParseTree
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# SHARED PACKED PARSE FOREST
+# --------------------------------------------------
+
+class ParseForest:
+    """Shared packed parse forest (SPPF) of a GLR parse.
+
+    A node is a (sym_id, start, end) tuple: the symbol derives tokens
+    start..end-1. Terminal nodes are leaves; families[node] lists the
+    packed alternatives of a non-terminal node as (prod_id, children)
+    tuples, children being nodes. Subtrees common to several derivations
+    are stored once, and a node with more than one family is ambiguous.
+    Cyclic grammars give cyclic forests.
+    """
+
+    def __init__(self, n_terminals):
+        self.n_terminals = n_terminals
+        self.families = {}
+        self.root = None
+
+    def add_family(self, node, prod_id, children):
+        families = self.families.setdefault(node, [])
+        family = (prod_id, children)
+        if family not in families:
+            families.append(family)
+
+    def is_leaf(self, node):
+        return node[0] < self.n_terminals
+
+    def alternatives(self, node):
+        return self.families.get(node, ())
+
+    def ambiguous_nodes(self):
+        return [node for node, families in self.families.items() if len(families) > 1]
+
+    def count_trees(self, node=None):
+        """Number of parse trees below node (the root by default); float('inf') for cycles"""
+        root = self.root if node is None else node
+        if self.is_leaf(root):
+            return 1
+        counts = {}  # node -> count, None while its descendants are counted
+        stack = [(root, False)]
+        while stack:
+            n, done = stack.pop()
+            if not done:
+                if n in counts:
+                    continue
+                counts[n] = None
+                stack.append((n, True))
+                for _, children in self.families[n]:
+                    stack.extend((c, False) for c in children if not self.is_leaf(c) and c not in counts)
+                continue
+
+            total = 0
+            for _, children in self.families[n]:
+                product = 1
+                for c in children:
+                    if not self.is_leaf(c):
+                        # A child still being counted is an ancestor: a cycle
+                        product *= counts[c] if counts[c] is not None else float('inf')
+                total += product
+            counts[n] = total
+        return counts[root]
+
+    def first_tree(self):
+        """One parse tree of the forest as a ParseTree, taking the first acyclic family of each node"""
+        tree = ParseTree(self.n_terminals)
+        if self.root is None:
+            return tree
+        ids = {}  # node -> tree node ID, None while its subtree is built
+        chosen = {}
+        stack = [(self.root, False)]
+        while stack:
+            n, done = stack.pop()
+            if not done:
+                if n in ids:
+                    continue
+                ids[n] = None
+                for _, children in self.families[n]:
+                    if not any(ids.get(c, 0) is None for c in children):
+                        break
+                else:
+                    raise ValueError(f"Only cyclic derivations for node {n}")
+                chosen[n] = children
+                stack.append((n, True))
+                stack.extend((c, False) for c in reversed(children) if not self.is_leaf(c) and c not in ids)
+                continue
+
+            child_ids = [tree.add_leaf(c[0], c[1]) if self.is_leaf(c) else ids[c] for c in chosen[n]]
+            ids[n] = tree.add_node(n[0], child_ids)
+        tree.root = ids[self.root]
+        return tree
+
+    def __len__(self):
+        return len(self.families)
+
+
+# --------------------------------------------------
+# GRAPH-STRUCTURED STACK
+# --------------------------------------------------
+
+class _StackNode:
+    """GSS node: an LR state reached at a token position.
+
+    edges are (node, forest node) tuples towards the nodes below it; the
+    forest node is the symbol derived between the two positions.
+    """
+    __slots__ = ('state', 'level', 'edges')
+
+    def __init__(self, state, level):
+        self.state = state
+        self.level = level
+        self.edges = []
+
+
+def _paths(node, length, via=None):
+    """Yield (bottom node, forest nodes left to right) of every path of length edges from node.
+
+    With via, only the paths that use that edge are yielded.
+    """
+    labels = ()
+    if via is None:
+        # Deterministic stretches have a single path: follow it without a stack
+        while length and len(node.edges) == 1:
+            node, label = node.edges[0]
+            labels = (label,) + labels
+            length -= 1
+        if not length:
+            yield node, labels
+            return
+
+    stack = [(node, length, labels, via is None)]
+    while stack:
+        current, left, labels, used = stack.pop()
+        if not left:
+            if used:
+                yield current, labels
+            continue
+        for edge in current.edges:
+            stack.append((edge[0], left - 1, (edge[1],) + labels, used or edge is via))
+
+
+def glr_actions(tables):
+    """{(state, term_id): actions} of the cells GLR explores more than one action in.
+
+    Conflicts settled by declared precedence keep the action written to the
+    table; the others keep every competing action.
+    """
+    return {
+        key: conflict.actions
+        for key, conflict in tables.conflicts.items()
+        if conflict.resolved_by == BY_DEFAULT
+    }
+
+
+# --------------------------------------------------
+# DRIVER
+# --------------------------------------------------
+
+class GLRResult(ParseResult):
+    """ParseResult of parse_glr, with the parse forest and the widest GSS frontier seen"""
+
+    def __init__(self, accepted, position, state=None, token=None, forest=None, max_stacks=1):
+        super().__init__(accepted, position, state, token)
+        self.forest = forest
+        self.max_stacks = max_stacks
+
+    def error_message(self, grammar):
+        if self.accepted or self.state is not None:
+            return super().error_message(grammar)
+        return f"Error at token {token_name(grammar, self.token)}: no stack can continue"
+
+
+def parse_glr(tables, tokens, actions=None):
+    """Parse an iterable of terminal IDs ending with '$' with a Tomita-style GLR driver.
+
+    Cells with an unresolved conflict fork the parse: each stack top of the
+    graph-structured stack applies every action of its cell, tops reaching
+    the same state at the same position are merged, and reductions are
+    replayed along edges added to a merged top (Farshi's fix, so empty
+    productions work). Derivations go into a ParseForest. Where the table
+    has no conflict there is a single top, so deterministic stretches of
+    input parse in linear time, at about twice the cost of parse_tree.
+    actions defaults to glr_actions(tables).
+    """
+    action = tables.action
+    goto = tables.goto
+    prod_left = tables.prod_left
+    prod_len = tables.prod_len
+    n_terminals = tables.n_terminals
+    n_non_terminals = tables.n_non_terminals
+    forked = glr_actions(tables) if actions is None else actions
+    forked = {state * n_terminals + term_id: acts for (state, term_id), acts in forked.items()}
+
+    def cell(state, token):
+        cell_id = state * n_terminals + token
+        found = forked.get(cell_id)
+        if found is not None:
+            return found
+        code = action[cell_id]
+        return (code,) if code != ERROR else ()
+
+    forest = ParseForest(n_terminals)
+    tops = {0: _StackNode(0, 0)}
+    tokens = iter(tokens)
+    token = next(tokens, -1)
+    position = 0
+    max_stacks = 1
+
+    while True:
+        if not 0 <= token < n_terminals:
+            state = next(iter(tops)) if len(tops) == 1 else None
+            return GLRResult(False, position, state, token, max_stacks=max_stacks)
+
+        # Actions of each top on this token, by state
+        cells = {state: cell(state, token) for state in tops}
+
+        # Reduce until no top changes, then shift every top that can
+        queue = deque()
+        for node in tops.values():
+            for code in cells[node.state]:
+                if code < ACCEPT:
+                    queue.append((node, -code - 1, None))
+        # Whether this level has edges within it, which only empty reductions add
+        empty_edges = False
+
+        while queue:
+            node, prod_id, via = queue.popleft()
+            nt_index = prod_left[prod_id]
+            lhs = nt_index + n_terminals
+            for bottom, children in _paths(node, prod_len[prod_id], via):
+                label = (lhs, bottom.level, position)
+                forest.add_family(label, prod_id, children)
+
+                target = goto[bottom.state * n_non_terminals + nt_index]
+                top = tops.get(target)
+                if top is None:
+                    top = tops[target] = _StackNode(target, position)
+                    top.edges.append((bottom, label))
+                    empty_edges |= bottom.level == position
+                    cells[target] = cell(target, token)
+                    for code in cells[target]:
+                        if code < ACCEPT:
+                            queue.append((top, -code - 1, None))
+                elif not any(e[0] is bottom for e in top.edges):
+                    edge = (bottom, label)
+                    top.edges.append(edge)
+                    empty_edges |= bottom.level == position
+                    # Reductions through the new edge: from the top itself, or
+                    # from any top of this level once empty reductions link tops
+                    for other in (tops.values() if empty_edges else (top,)):
+                        for code in cells[other.state]:
+                            if code < ACCEPT and prod_len[-code - 1]:
+                                queue.append((other, -code - 1, edge))
+
+        shifted = {}
+        leaf = (token, position, position + 1)
+        for node in tops.values():
+            for code in cells[node.state]:
+                if code > 0:
+                    top = shifted.get(code - 1)
+                    if top is None:
+                        top = shifted[code - 1] = _StackNode(code - 1, position + 1)
+                    top.edges.append((node, leaf))
+                elif code == ACCEPT:
+                    forest.root = next(label for bottom, label in node.edges if bottom.level == 0 and bottom.state == 0)
+                    logger.info(f"[LOG glr_accept] ========= GLR parse accepted {position} tokens, "
+                                f"{len(forest)} forest nodes, up to {max_stacks} stacks")
+                    return GLRResult(True, position, forest=forest, max_stacks=max_stacks)
+
+        if not shifted:
+            state = next(iter(tops)) if len(tops) == 1 else None
+            return GLRResult(False, position, state, token, max_stacks=max_stacks)
+
+        tops = shifted
+        max_stacks = max(max_stacks, len(tops))
+        token = next(tokens, -1)
+        position += 1
@@ -1,6 +1,7 @@
 # core/grammar.py
 
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,17 @@ class NonTerminal(Symbol):
     pass
 
 
+# Associativity of a precedence level, as in yacc's %left, %right and %nonassoc
+LEFT = 'left'
+RIGHT = 'right'
+NONASSOC = 'nonassoc'
+
+
+def symbol_sort_key(sym):
+    """Deterministic ordering for symbols: terminals first, then by name"""
+    return (isinstance(sym, NonTerminal), sym.name)
+
+
 class Production:
     def __init__(self, left: NonTerminal, right: list[Symbol]):
         self.left = left
@@ -42,6 +54,86 @@ class Production:
         return str(self)
 
 
+# --------------------------------------------------
+# BITSETS
+# --------------------------------------------------
+
+@lru_cache(maxsize=4096)
+def bit_ids(bits):
+    """Return the indices of the set bits of an int, in increasing order"""
+    ids = []
+    while bits:
+        low = bits & -bits
+        ids.append(low.bit_length() - 1)
+        bits ^= low
+    return tuple(ids)
+
+
+def _strongly_connected_components(deps):
+    """Tarjan's algorithm over node indices, iterative.
+
+    deps[n] is the set of nodes n depends on. Components are returned so that
+    every component comes after all components it depends on.
+    """
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+
+    for root in range(len(deps)):
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(deps[root]))]
+
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(deps[child])))
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+    return components
+
+
+def _propagate_bits(base, deps):
+    """Solve bits[n] = base[n] | OR(bits[d] for d in deps[n]) in one pass per component"""
+    bits = list(base)
+    for component in _strongly_connected_components(deps):
+        members = set(component)
+        combined = 0
+        for node in component:
+            combined |= base[node]
+            for dep in deps[node]:
+                if dep not in members:
+                    combined |= bits[dep]
+        for node in component:
+            bits[node] = combined
+    return bits
+
+
 class Grammar:
     def __init__(self, start_symbol: NonTerminal, productions: list[Production]):
         self.start_symbol = start_symbol
@@ -49,8 +141,10 @@ class Grammar:
 
         self.non_terminals = set()
         self.terminals = set()
+        self.precedence = []
 
         self._collect_symbols()
+        self._number_symbols()
 
     def _collect_symbols(self):
         for prod in self.productions:
@@ -67,41 +161,252 @@ class Grammar:
         self.productions.insert(0, new_production)
         self.start_symbol = new_start
         self.non_terminals.add(new_start)
+        self._number_symbols()
         logger.debug(f"[LOG grammar_augment] ========= Grammar augmented with new start symbol: {new_start}")
 
-    def compute_first(self):
-        self.first = {symbol: set() for symbol in self.non_terminals.union(self.terminals)}
-
-        # FIRST of terminals is itself
-        for t in self.terminals:
-            self.first[t].add(t)
-
-        changed = True
-        while changed:
-            changed = False
-            for prod in self.productions:
-                left = prod.left
-                right = prod.right
-                can_derive_epsilon = True
-
-                for sym in right:
-                    before = len(self.first[left])
-                    self.first[left].update(self.first[sym] - set(['ε']))
-                    after = len(self.first[left])
-                    if after > before:
-                        changed = True
-
-                    if 'ε' not in self.first[sym]:
-                        can_derive_epsilon = False
-                        break
-
-                if can_derive_epsilon:
-                    if 'ε' not in self.first[left]:
-                        self.first[left].add('ε')
-                        changed = True
-        
+    def set_precedence(self, levels):
+        """Declare operator precedence for resolving table conflicts.
+
+        levels is a list of (associativity, [Terminal, ...]) from lowest to
+        highest precedence, associativity being LEFT, RIGHT or NONASSOC.
+        """
+        for assoc, _ in levels:
+            if assoc not in (LEFT, RIGHT, NONASSOC):
+                raise ValueError(f"Unknown associativity: {assoc}")
+        self.precedence = [(assoc, list(terminals)) for assoc, terminals in levels]
+
+    def precedence_ids(self):
+        """Return (term_prec, prod_prec) for the declared precedence.
+
+        term_prec maps terminal IDs to (level, associativity), level 1 being
+        the lowest. prod_prec[p] is the entry of the rightmost terminal of
+        production p that has a precedence, or None.
+        """
+        term_prec = {}
+        for level, (assoc, terminals) in enumerate(self.precedence, 1):
+            for term in terminals:
+                sym_id = self.symbol_ids.get(term)
+                if sym_id is not None:
+                    term_prec[sym_id] = (level, assoc)
+
+        prod_prec = []
+        for right in self.prod_right:
+            prec = None
+            for sym_id in reversed(right):
+                if sym_id in term_prec:
+                    prec = term_prec[sym_id]
+                    break
+            prod_prec.append(prec)
+        return term_prec, prod_prec
+
+    def _number_symbols(self):
+        """Assign integer IDs to symbols and productions.
+
+        Terminals get IDs 0..n_terminals-1 and non-terminals the IDs after
+        them, each group ordered by symbol_sort_key. '$' is always numbered.
+        Productions are numbered by their position in self.productions.
+        """
+        terminals = self.terminals | {Terminal('$')}
+        self.symbols = sorted(terminals, key=symbol_sort_key) + sorted(self.non_terminals, key=symbol_sort_key)
+        self.symbol_ids = {sym: i for i, sym in enumerate(self.symbols)}
+        self.n_terminals = len(terminals)
+        self.end_id = self.symbol_ids[Terminal('$')]
+
+        self.production_ids = {prod: i for i, prod in enumerate(self.productions)}
+        self.prod_left = [self.symbol_ids[prod.left] for prod in self.productions]
+        self.prod_right = [tuple(self.symbol_ids[sym] for sym in prod.right) for prod in self.productions]
+        self.prod_ids_by_left = [[] for _ in self.symbols]
+        for prod_id, left in enumerate(self.prod_left):
+            self.prod_ids_by_left[left].append(prod_id)
+
+        # Closures, suffix FIRST sets, lexers and item text depend on the numbering.
+        # Threads sharing a grammar fill them with single get/set dict operations
+        self.closure_cache = {}
+        self._suffix_first = {}
+        self.lexer_cache = {}
+        self.item_text_cache = {}
+
+    # Caches rebuilt on demand, left out when the grammar is pickled for workers
+    _CACHES = ('closure_cache', '_suffix_first', 'lexer_cache', 'item_text_cache')
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self._CACHES:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for name in self._CACHES:
+            setattr(self, name, {})
+
+    def compute_first(self, previous=None):
+        """Compute nullable, FIRST and FOLLOW as bitsets over terminal IDs.
+
+        FIRST and FOLLOW are propagated once per strongly connected component
+        of the non-terminal dependency graph, in dependency order, instead of
+        iterating over all productions until nothing changes. self.first keeps
+        the Symbol sets (with 'ε' for nullable symbols) for display.
+
+        previous may be an earlier version of this grammar with FIRST already
+        computed. FIRST is then only propagated for non-terminals whose
+        productions or nullability changed and those depending on them; the
+        others keep their previous sets. self.changed_symbols is set to the
+        IDs of the non-terminals whose productions, nullability or FIRST set
+        differ from previous (None without previous).
+        """
+        self._number_symbols()
+        self._compute_nullable()
+        self._compute_first_bits(previous)
+        self._compute_follow_bits()
+
+        self.first = {}
+        for sym in self.non_terminals | self.terminals:
+            sym_id = self.symbol_ids[sym]
+            self.first[sym] = {self.symbols[t] for t in bit_ids(self.first_bits[sym_id])}
+            if self.nullable[sym_id]:
+                self.first[sym].add('ε')
+
         logger.info(f"[LOG first_sets_computed] ========= FIRST sets computed for {len(self.non_terminals)} non-terminals")
 
+    def _compute_nullable(self):
+        self.nullable = [False] * len(self.symbols)
+
+        # Count the not-yet-nullable RHS symbols of each production
+        remaining = [len(right) for right in self.prod_right]
+        uses = [[] for _ in self.symbols]
+        for prod_id, right in enumerate(self.prod_right):
+            for sym_id in right:
+                uses[sym_id].append(prod_id)
+
+        worklist = [prod_id for prod_id, count in enumerate(remaining) if count == 0]
+        while worklist:
+            left = self.prod_left[worklist.pop()]
+            if self.nullable[left]:
+                continue
+            self.nullable[left] = True
+            for prod_id in uses[left]:
+                remaining[prod_id] -= 1
+                if remaining[prod_id] == 0:
+                    worklist.append(prod_id)
+
+    def _compute_first_bits(self, previous=None):
+        n_terminals = self.n_terminals
+        base = [1 << sym_id if sym_id < n_terminals else 0 for sym_id in range(len(self.symbols))]
+        deps = [set() for _ in self.symbols]
+
+        for left, right in zip(self.prod_left, self.prod_right):
+            for sym_id in right:
+                if sym_id < n_terminals:
+                    base[left] |= 1 << sym_id
+                    break
+                deps[left].add(sym_id)
+                if not self.nullable[sym_id]:
+                    break
+
+        self.changed_symbols = None
+        if previous is None:
+            self.first_bits = _propagate_bits(base, deps)
+            return
+
+        # Non-terminals whose own productions or nullability changed, and
+        # everything whose FIRST depends on them, need propagating
+        old_ids = [previous.symbol_ids.get(sym, -1) for sym in self.symbols]
+        changed = self._changed_productions(previous)
+        changed.update(
+            sym_id for sym_id in range(n_terminals, len(self.symbols))
+            if old_ids[sym_id] < previous.n_terminals or previous.nullable[old_ids[sym_id]] != self.nullable[sym_id]
+        )
+        dependents = [[] for _ in self.symbols]
+        for sym_id, sym_deps in enumerate(deps):
+            for dep in sym_deps:
+                dependents[dep].append(sym_id)
+        affected = set(changed)
+        worklist = list(changed)
+        while worklist:
+            for sym_id in dependents[worklist.pop()]:
+                if sym_id not in affected:
+                    affected.add(sym_id)
+                    worklist.append(sym_id)
+
+        translate = self._terminal_bits_from(previous)
+        for sym_id in range(n_terminals, len(self.symbols)):
+            if sym_id not in affected:
+                base[sym_id] = translate(previous.first_bits[old_ids[sym_id]])
+                deps[sym_id] = ()
+
+        self.first_bits = _propagate_bits(base, deps)
+        self.changed_symbols = changed | {
+            sym_id for sym_id in affected - changed
+            if self.first_bits[sym_id] != translate(previous.first_bits[old_ids[sym_id]])
+        }
+
+        logger.info(f"[LOG first_sets_incremental] ========= FIRST recomputed for {len(affected)} of "
+                    f"{len(self.symbols) - n_terminals} non-terminals, {len(self.changed_symbols)} changed")
+
+    def _changed_productions(self, previous):
+        """IDs of the non-terminals whose productions differ from previous, compared by name and kind"""
+        def by_left(grammar):
+            rights = {}
+            for left, right in zip(grammar.prod_left, grammar.prod_right):
+                rights.setdefault(grammar.symbols[left].name, []).append(
+                    tuple(symbol_sort_key(grammar.symbols[sym_id]) for sym_id in right))
+            return {name: sorted(r) for name, r in rights.items()}
+
+        old, new = by_left(previous), by_left(self)
+        return {
+            sym_id for sym_id in range(self.n_terminals, len(self.symbols))
+            if new.get(self.symbols[sym_id].name, []) != old.get(self.symbols[sym_id].name, [])
+        }
+
+    def _terminal_bits_from(self, previous):
+        """Return a function mapping previous's terminal bitsets to this grammar's terminal IDs"""
+        old_terminals = previous.symbols[:previous.n_terminals]
+        if old_terminals == self.symbols[:self.n_terminals]:
+            return lambda bits: bits
+        new_ids = [self.symbol_ids.get(sym, -1) for sym in old_terminals]
+
+        def translate(bits):
+            result = 0
+            for t in bit_ids(bits):
+                if new_ids[t] >= 0:
+                    result |= 1 << new_ids[t]
+            return result
+        return translate
+
+    def _compute_follow_bits(self):
+        base = [0] * len(self.symbols)
+        deps = [set() for _ in self.symbols]
+        base[self.symbol_ids[self.start_symbol]] |= 1 << self.end_id
+
+        for prod_id, (left, right) in enumerate(zip(self.prod_left, self.prod_right)):
+            for dot, sym_id in enumerate(right):
+                if sym_id < self.n_terminals:
+                    continue
+                first_beta, beta_nullable = self.first_of_suffix(prod_id, dot + 1)
+                base[sym_id] |= first_beta
+                if beta_nullable:
+                    deps[sym_id].add(left)
+
+        self.follow_bits = _propagate_bits(base, deps)
+
+    def first_of_sequence(self, sym_ids):
+        """Return (FIRST bitset, nullable) for a sequence of symbol IDs"""
+        bits = 0
+        for sym_id in sym_ids:
+            bits |= self.first_bits[sym_id]
+            if not self.nullable[sym_id]:
+                return bits, False
+        return bits, True
+
+    def first_of_suffix(self, prod_id, start):
+        """Return (FIRST bitset, nullable) for the RHS of prod_id from start, memoized"""
+        key = (prod_id, start)
+        cached = self._suffix_first.get(key)
+        if cached is None:
+            cached = self._suffix_first[key] = self.first_of_sequence(self.prod_right[prod_id][start:])
+        return cached
+
     def print_first(self):
         print("\nFIRST sets:")
         for sym in self.non_terminals:
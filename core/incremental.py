@@ -0,0 +1,434 @@
+# core/incremental.py
+
+from array import array
+from core.parser import ParseResult
+from core.tables import ACCEPT
+from core.tree import ParseTree
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# INCREMENTAL PARSER
+# --------------------------------------------------
+# The tree is kept in an append-only arena of parallel arrays. Nodes never
+# change once created, so an edit builds new nodes for the edited region and
+# the spine above it and shares every other subtree with the previous tree.
+# Besides symbol and children, each node records:
+#   n_tokens    number of tokens it covers (0 for an ε-reduction)
+#   n_chars     number of characters it covers, including the whitespace
+#               before each of its tokens
+#   left_state  the state on top of the stack when its first token was read
+#
+# Positions are implied by the widths, so reused subtrees need no updating
+# when text before them grows or shrinks.
+
+
+class IncrementalParser:
+    """Parser for a document that changes by small edits.
+
+    parse(text) parses from scratch; edit(offset, deleted, inserted) applies
+    a text edit and re-parses. Only the tokens around the edit are re-lexed.
+    The parse restarts from the stack the previous parse had just before the
+    first re-lexed token, rebuilt from the tree, and to the right of the edit
+    any old subtree whose recorded left_state matches the current top state
+    is pushed whole instead of being parsed again (state matching). The cost
+    of an edit is therefore proportional to the edit plus the depth of the
+    tree at the edit, not to the size of the document.
+
+    If the edited text does not parse, the tree of the last successful parse
+    is kept and later edits are re-parsed against it as one combined edit.
+    """
+
+    def __init__(self, tables, lexer, text=''):
+        self.tables = tables
+        self.lexer = lexer
+        self.n_terminals = tables.n_terminals
+        self.text = ''
+        self.result = None
+        self._reset_arena()
+        self.root = None
+        self._pending = None  # (start, end in last parsed text, end in text) not yet parsed
+        self.parse(text)
+
+    def _reset_arena(self):
+        self.symbol = array('i')
+        self.child_start = array('i')
+        self.child_count = array('i')
+        self.children = array('i')
+        self.n_tokens = array('i')
+        self.n_chars = array('i')
+        self.left_state = array('i')
+        self._compact_at = 1024
+
+    # ---------------- arena ----------------
+
+    def _add_leaf(self, term_id, width, left_state):
+        self.symbol.append(term_id)
+        self.child_start.append(len(self.children))
+        self.child_count.append(0)
+        self.n_tokens.append(1)
+        self.n_chars.append(width)
+        self.left_state.append(left_state)
+        return len(self.symbol) - 1
+
+    def _add_node(self, sym_id, child_ids, left_state):
+        n_tokens = self.n_tokens
+        n_chars = self.n_chars
+        self.symbol.append(sym_id)
+        self.child_start.append(len(self.children))
+        self.child_count.append(len(child_ids))
+        self.children.extend(child_ids)
+        self.n_tokens.append(sum(n_tokens[c] for c in child_ids))
+        self.n_chars.append(sum(n_chars[c] for c in child_ids))
+        self.left_state.append(left_state)
+        return len(self.symbol) - 1
+
+    def _truncate(self, n_nodes):
+        del self.children[self.child_start[n_nodes] if n_nodes < len(self.symbol) else len(self.children):]
+        for arr in (self.symbol, self.child_start, self.child_count, self.n_tokens, self.n_chars, self.left_state):
+            del arr[n_nodes:]
+
+    def children_of(self, node):
+        start = self.child_start[node]
+        return self.children[start:start + self.child_count[node]]
+
+    def is_leaf(self, node):
+        return self.symbol[node] < self.n_terminals
+
+    def _compact(self):
+        """Copy the live tree into a fresh arena, dropping nodes of old trees"""
+        symbol, child_start, child_count, children = self.symbol, self.child_start, self.child_count, self.children
+        n_tokens, n_chars, left_state = self.n_tokens, self.n_chars, self.left_state
+        self._reset_arena()
+
+        # Post-order copy, so children get their new IDs before their parent
+        new_ids = {}
+        todo = [(self.root, False)]
+        while todo:
+            node, expanded = todo.pop()
+            kids = children[child_start[node]:child_start[node] + child_count[node]]
+            if kids and not expanded:
+                todo.append((node, True))
+                todo.extend((c, False) for c in reversed(kids))
+                continue
+            self.symbol.append(symbol[node])
+            self.child_start.append(len(self.children))
+            self.child_count.append(len(kids))
+            self.children.extend(new_ids.pop(c) for c in kids)
+            self.n_tokens.append(n_tokens[node])
+            self.n_chars.append(n_chars[node])
+            self.left_state.append(left_state[node])
+            new_ids[node] = len(self.symbol) - 1
+
+        self.root = new_ids[self.root]
+        self._compact_at = max(1024, 2 * len(self.symbol))
+
+    # ---------------- locating tokens ----------------
+
+    def _first_token_ending_at(self, char_pos):
+        """Return (token index, char start) of the first token ending at or after char_pos.
+
+        The char start includes the whitespace before the token. If no token
+        ends that late, returns (number of tokens, end of the last token).
+        """
+        node, token, char = self.root, 0, 0
+        while not self.is_leaf(node):
+            for child in self.children_of(node):
+                if self.n_tokens[child] and char + self.n_chars[child] >= char_pos:
+                    node = child
+                    break
+                token += self.n_tokens[child]
+                char += self.n_chars[child]
+            else:
+                return token, char
+        return token, char
+
+    def _leaf_ends(self, token):
+        """Yield (term_id, char end) of the leaves from token index onwards"""
+        todo = [self.root]
+        start = char = 0
+        while todo:
+            node = todo.pop()
+            n = self.n_tokens[node]
+            if start + n <= token:
+                # Entirely before token
+                start += n
+                char += self.n_chars[node]
+            elif self.is_leaf(node):
+                start += 1
+                char += self.n_chars[node]
+                yield self.symbol[node], char
+            else:
+                todo.extend(reversed(self.children_of(node)))
+
+    def _push_state(self, states, node):
+        sym = self.symbol[node]
+        tables = self.tables
+        if sym < self.n_terminals:
+            states.append(tables.action[states[-1] * self.n_terminals + sym] - 1)
+        else:
+            states.append(tables.goto[states[-1] * tables.n_non_terminals + sym - self.n_terminals])
+
+    def _stack_before(self, token):
+        """Rebuild the parse stack as it was right after shifting token - 1.
+
+        Nodes that end at token - 1 were reduced with token as lookahead, so
+        they are broken down; everything completed before that is kept.
+        """
+        states, nodes = [0], []
+        last = token - 1
+        node, start = self.root, 0
+        while token:
+            descend = None
+            for child in self.children_of(node):
+                n = self.n_tokens[child]
+                if n and start + n > last:
+                    if self.is_leaf(child):
+                        nodes.append(child)
+                        self._push_state(states, child)
+                    else:
+                        descend = child
+                    break
+                if not n and start > last:
+                    break
+                nodes.append(child)
+                self._push_state(states, child)
+                start += n
+            if descend is None:
+                break
+            node = descend
+        return states, nodes
+
+    # ---------------- parsing ----------------
+
+    def parse(self, text):
+        """Parse text from scratch and return the ParseResult"""
+        self.text = text
+        self._reset_arena()
+        self.root = None
+        self._pending = None
+
+        new_tokens = []
+        prev = 0
+        for term_id, lexeme, start in self.lexer.scan(text):
+            end = start + len(lexeme)
+            new_tokens.append((term_id, end - prev))
+            prev = end
+
+        states, nodes = [0], []
+        return self._run(states, nodes, new_tokens, None, 0)
+
+    def edit(self, offset, deleted, inserted):
+        """Replace text[offset:offset + deleted] with inserted and re-parse"""
+        if offset < 0 or deleted < 0 or offset + deleted > len(self.text):
+            raise ValueError(f"Edit ({offset}, {deleted}) is outside a text of length {len(self.text)}")
+
+        self.text = self.text[:offset] + inserted + self.text[offset + deleted:]
+        if self.root is None:
+            return self.parse(self.text)
+
+        # Merge with edits the last parsed tree has not seen yet
+        end = offset + deleted
+        if self._pending is None:
+            start, old_end = offset, end
+        else:
+            p_start, p_old_end, p_end = self._pending
+            start = min(p_start, offset)
+            end = max(p_end, end)
+            old_end = end - (p_end - p_old_end)
+        new_end = end + len(inserted) - deleted
+        self._pending = (start, old_end, new_end)
+
+        return self._reparse(start, old_end, new_end)
+
+    def _reparse(self, start, old_end, new_end):
+        delta = new_end - old_end
+        text = self.text
+        old_root = self.root
+
+        # Re-lex from the first token the edit could have changed; a literal
+        # match may look up to max_literal_len characters ahead
+        lookback = max(1, self.lexer.max_literal_len)
+        first, pos = self._first_token_ending_at(start - lookback)
+        n_old = self.n_tokens[old_root]
+
+        # Stop once a new token ends where an old one did, past the edit:
+        # from there on the two texts lex identically
+        new_tokens = []
+        resume = n_old
+        old_leaves = self._leaf_ends(first) if first < n_old else iter(())
+        old_index, old_token_end = first, -1
+        prev = pos
+        for term_id, lexeme, tok_start in self.lexer.scan(text, pos):
+            end = tok_start + len(lexeme)
+            new_tokens.append((term_id, end - prev))
+            prev = end
+            if end >= new_end:
+                target = end - delta
+                while old_token_end < target:
+                    leaf = next(old_leaves, None)
+                    if leaf is None:
+                        break
+                    old_token_end = leaf[1]
+                    old_index += 1
+                if old_token_end == target:
+                    resume = old_index
+                    break
+
+        states, nodes = self._stack_before(first)
+        logger.info(f"[LOG incremental_parse] ========= Re-lexed {len(new_tokens)} tokens, "
+                    f"reusing {first} tokens before and {n_old - resume} after the edit")
+        return self._run(states, nodes, new_tokens, old_root, resume, first)
+
+    def _run(self, states, nodes, new_tokens, old_root, resume, first=0):
+        """Parse new_tokens on top of the given stack, then the old tokens from resume"""
+        tables = self.tables
+        action = tables.action
+        goto = tables.goto
+        prod_left = tables.prod_left
+        prod_len = tables.prod_len
+        n_terminals = self.n_terminals
+        n_non_terminals = tables.n_non_terminals
+        end_id = self.lexer.end_id
+
+        n_old = self.n_tokens[old_root] if old_root is not None else 0
+        cursor = _Cursor(self, old_root) if old_root is not None else None
+        candidates_at, old_candidates = -1, ()
+        arena_size = len(self.symbol)
+        new_index = 0
+        old_index = resume
+        position = first
+
+        while True:
+            if new_index < len(new_tokens):
+                token, width = new_tokens[new_index]
+                candidates = ()
+            elif old_index < n_old:
+                if candidates_at != old_index:
+                    candidates_at, old_candidates = old_index, cursor.candidates(old_index)
+                candidates = old_candidates
+                leaf = candidates[-1]
+                token, width = self.symbol[leaf], self.n_chars[leaf]
+            else:
+                token, width, candidates = end_id, 0, ()
+
+            state = states[-1]
+
+            # Push a whole old subtree if it was parsed from this same state
+            reused = None
+            for node in candidates:
+                if self.left_state[node] == state:
+                    reused = node
+                    break
+            if reused is not None:
+                sym = self.symbol[reused]
+                if sym < n_terminals:
+                    states.append(action[state * n_terminals + sym] - 1)
+                else:
+                    states.append(goto[state * n_non_terminals + sym - n_terminals])
+                nodes.append(reused)
+                old_index += self.n_tokens[reused]
+                position += self.n_tokens[reused]
+                continue
+
+            code = action[state * n_terminals + token] if 0 <= token < n_terminals else 0
+
+            if code > 0:
+                nodes.append(self._add_leaf(token, width, state))
+                states.append(code - 1)
+                position += 1
+                if new_index < len(new_tokens):
+                    new_index += 1
+                else:
+                    old_index += 1
+
+            elif code < ACCEPT:
+                prod_id = -code - 1
+                rhs_len = prod_len[prod_id]
+                child_ids = nodes[len(nodes) - rhs_len:]
+                if rhs_len:
+                    del nodes[-rhs_len:]
+                    del states[-rhs_len:]
+                nodes.append(self._add_node(prod_left[prod_id] + n_terminals, child_ids, states[-1]))
+                states.append(goto[states[-1] * n_non_terminals + prod_left[prod_id]])
+
+            elif code == ACCEPT:
+                self.root = nodes[-1]
+                self._pending = None
+                if len(self.symbol) > self._compact_at:
+                    self._compact()
+                self.result = ParseResult(True, position)
+                return self.result
+
+            else:
+                # Drop the nodes of the failed parse; the previous tree only uses older ones
+                self._truncate(arena_size)
+                self.result = ParseResult(False, position, state, token)
+                return self.result
+
+    # ---------------- output ----------------
+
+    def to_tree(self):
+        """Return the current tree as a ParseTree with absolute token positions"""
+        tree = ParseTree(self.n_terminals)
+        if self.root is None:
+            return tree
+
+        ids = {}
+        todo = [(self.root, 0, False)]
+        while todo:
+            node, token, expanded = todo.pop()
+            kids = self.children_of(node)
+            if self.is_leaf(node):
+                ids[node] = tree.add_leaf(self.symbol[node], token)
+            elif expanded or not kids:
+                ids[node] = tree.add_node(self.symbol[node], [ids.pop(c) for c in kids])
+            else:
+                todo.append((node, token, True))
+                starts = []
+                for child in kids:
+                    starts.append((child, token, False))
+                    token += self.n_tokens[child]
+                todo.extend(reversed(starts))
+
+        tree.root = ids[self.root]
+        return tree
+
+
+class _Cursor:
+    """Path from the old root to the leaf at a token index, advanced left to right"""
+
+    def __init__(self, parser, root):
+        self.parser = parser
+        self.path = [(root, 0)]
+
+    def candidates(self, token):
+        """Old nodes that start at token, outermost first, ending with its leaf"""
+        parser = self.parser
+        path = self.path
+        while len(path) > 1:
+            node, start = path[-1]
+            if start <= token < start + parser.n_tokens[node]:
+                break
+            path.pop()
+
+        node, start = path[-1]
+        while not parser.is_leaf(node):
+            for child in parser.children_of(node):
+                n = parser.n_tokens[child]
+                if start + n > token and n:
+                    node = child
+                    break
+                start += n
+            path.append((node, start))
+
+        # Starts only grow going down the path, so the nodes starting at token are at its end
+        found = []
+        for node, start in reversed(path):
+            if start != token:
+                break
+            if parser.n_tokens[node]:
+                found.append(node)
+        found.reverse()
+        return found
@@ -0,0 +1,172 @@
+# core/jobs.py
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# PROGRESS AND LIMITS
+# --------------------------------------------------
+
+class BuildAborted(Exception):
+    """Raised inside a state construction loop to stop the build"""
+
+
+class BuildCancelled(BuildAborted):
+    pass
+
+
+class BuildLimitExceeded(BuildAborted):
+    pass
+
+
+class BuildProgress:
+    """Progress of one state construction, polled by other threads.
+
+    The construction loop calls update(states, worklist) once per processed
+    state; that raises BuildCancelled after cancel() and BuildLimitExceeded
+    once more than max_states states exist or timeout seconds have passed
+    since start() (None disables a limit). The clock starts on creation;
+    BuildJobs restarts it when a queued job begins running.
+    """
+
+    def __init__(self, max_states=None, timeout=None):
+        self.max_states = max_states
+        self.timeout = timeout
+        self.states = 0
+        self.worklist = 0
+        self._cancelled = threading.Event()
+        self.start()
+
+    def start(self):
+        self.deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def update(self, states, worklist):
+        self.states = states
+        self.worklist = worklist
+        if self._cancelled.is_set():
+            raise BuildCancelled("Build cancelled")
+        if self.max_states is not None and states > self.max_states:
+            raise BuildLimitExceeded(f"Build exceeded the limit of {self.max_states} states")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BuildLimitExceeded("Build exceeded its time limit")
+
+
+# --------------------------------------------------
+# JOBS
+# --------------------------------------------------
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class BuildJob:
+    def __init__(self, job_id, progress):
+        self.job_id = job_id
+        self.progress = progress
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created = time.monotonic()
+        self.started = None
+        self.finished = None
+
+    def snapshot(self):
+        """JSON-ready status, progress and, for failed jobs, the error"""
+        elapsed = 0.0
+        if self.started is not None:
+            elapsed = (self.finished or time.monotonic()) - self.started
+        snapshot = {
+            'job_id': self.job_id,
+            'status': self.status,
+            'states': self.progress.states,
+            'worklist': self.progress.worklist,
+            'elapsed': round(elapsed, 3),
+        }
+        if self.error is not None:
+            snapshot['error'] = self.error
+        return snapshot
+
+
+class BuildJobs:
+    """Runs builds on a worker pool and tracks them by job ID.
+
+    submit(fn, progress) runs fn(progress) on a worker thread; fn should pass
+    progress to the construction loop so the job can report and be
+    cancelled. Finished jobs are forgotten after ttl seconds.
+    """
+
+    def __init__(self, max_workers=2, ttl=600):
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='build')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, progress):
+        job = BuildJob(uuid.uuid4().hex, progress)
+        with self._lock:
+            self._evict()
+            self._jobs[job.job_id] = job
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Ask a job to stop; returns the job, or None if it is unknown.
+
+        A job still waiting for a worker is cancelled at once.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.progress.cancel()
+                if job.status == QUEUED:
+                    job.status = CANCELLED
+                    job.finished = time.monotonic()
+        return job
+
+    def _run(self, job, fn):
+        with self._lock:
+            if job.status != QUEUED:
+                return
+            # Time spent queued does not count against the build timeout
+            job.progress.start()
+            job.status = RUNNING
+            job.started = time.monotonic()
+        try:
+            job.result = fn(job.progress)
+            job.status = DONE
+        except BuildCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            logger.error(f"[LOG build_job_error] ========= Build job {job.job_id[:12]} failed: {e}")
+            job.error = str(e)
+            job.status = FAILED
+        job.finished = time.monotonic()
+        logger.info(f"[LOG build_job_finished] ========= Build job {job.job_id[:12]} {job.status}")
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished is not None and now - job.finished > self.ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
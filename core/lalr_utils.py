@@ -1,9 +1,9 @@
 # core/lalr_utils.py
 
-from core.Item import Item
-from core.grammar import NonTerminal, Terminal
 from collections import defaultdict
-from core.clr_utils import closure, goto
+from core.clr_utils import closure_ids, build_LR1_automaton, rebuild_LR1_automaton, decode_automaton
+from core.lr0_utils import build_LR0_automaton
+from core.parallel_lr1 import build_LR1_automaton_parallel
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,43 +13,57 @@ logger = logging.getLogger(__name__)
 # --------------------------------------------------
 
 def build_LALR_states(grammar):
-    # First, build LR(1) states
-    from core.clr_utils import build_LR1_states
-    lr1_states, lr1_transitions = build_LR1_states(grammar)
+    lr1_states, lr1_transitions = build_LR1_automaton(grammar)
+    lalr_states, lalr_transitions = merge_LR1_states(lr1_states, lr1_transitions)
+    return decode_automaton(lalr_states, lalr_transitions, grammar)
 
+
+def build_CLR_and_LALR_automata(grammar, previous=None, progress=None, workers=1):
+    """Build the packed canonical LR(1) collection once and derive the LALR(1) merge from it.
+
+    previous may be (grammar, clr_states, clr_transitions) of an earlier
+    version of the grammar, whose unaffected states are then reused (see
+    rebuild_LR1_automaton). Otherwise, with more than one worker, states are
+    expanded in a process pool (see build_LR1_automaton_parallel). progress
+    is passed on to the LR(1) construction.
+    """
+    if previous is not None:
+        clr_states, clr_transitions = rebuild_LR1_automaton(grammar, *previous, progress=progress)
+    elif workers > 1:
+        clr_states, clr_transitions = build_LR1_automaton_parallel(grammar, workers, progress)
+    else:
+        clr_states, clr_transitions = build_LR1_automaton(grammar, progress)
+    logger.info(f"[LOG clr_states_built] ========= Built canonical LR(1) states: {len(clr_states)}")
+
+    lalr_states, lalr_transitions = merge_LR1_states(clr_states, clr_transitions)
+    return clr_states, clr_transitions, lalr_states, lalr_transitions
+
+
+def build_CLR_and_LALR_states(grammar):
+    clr_states, clr_transitions, lalr_states, lalr_transitions = build_CLR_and_LALR_automata(grammar)
+    return (
+        *decode_automaton(clr_states, clr_transitions, grammar),
+        *decode_automaton(lalr_states, lalr_transitions, grammar),
+    )
+
+
+def merge_LR1_states(lr1_states, lr1_transitions):
+    """Merge packed canonical LR(1) states that share a core into LALR(1) states"""
     # Group states by their core items (ignoring lookaheads)
     core_to_states = defaultdict(list)
     for sid, state in enumerate(lr1_states):
-        # Create core by removing lookaheads
-        core = frozenset(Item(item.production, item.dot, None) for item in state)
+        core = frozenset((prod_id, dot) for prod_id, dot, _ in state)
         core_to_states[core].append(sid)
 
-    # Merge states with same core
+    # Merge lookaheads from all states with same core
     lalr_states = []
     state_mapping = {}  # old_lr1_id -> new_lalr_id
-    merged_states = {}  # core -> merged_state
-
-    for core, state_ids in core_to_states.items():
-        if len(state_ids) == 1:
-            # No merging needed
-            merged_state = lr1_states[state_ids[0]]
-            merged_states[core] = merged_state
-            lalr_states.append(merged_state)
-            state_mapping[state_ids[0]] = len(lalr_states) - 1
-        else:
-            # Merge lookaheads from all states with same core
-            merged_items = set()
-            for sid in state_ids:
-                for item in lr1_states[sid]:
-                    merged_items.add(item)  # Keep all lookaheads
-
-            merged_state = merged_items
-            merged_states[core] = merged_state
-            lalr_states.append(merged_state)
-
-            # Map all original states to this merged state
-            for sid in state_ids:
-                state_mapping[sid] = len(lalr_states) - 1
+
+    for state_ids in core_to_states.values():
+        merged_state = frozenset().union(*(lr1_states[sid] for sid in state_ids))
+        lalr_states.append(merged_state)
+        for sid in state_ids:
+            state_mapping[sid] = len(lalr_states) - 1
 
     # Build new transitions based on merged states
     lalr_transitions = {}
@@ -60,4 +74,100 @@ def build_LALR_states(grammar):
 
     logger.info(f"[LOG lalr_states_built] ========= Built LALR(1) states: {len(lalr_states)} (merged from {len(lr1_states)} LR(1) states)")
 
-    return lalr_states, lalr_transitions
\ No newline at end of file
+    return lalr_states, lalr_transitions
+
+
+# --------------------------------------------------
+# LALR FROM LR(0) WITH LOOKAHEAD PROPAGATION
+# --------------------------------------------------
+
+def _all_productive(grammar):
+    """Whether every non-terminal derives at least one terminal string"""
+    n_terminals = grammar.n_terminals
+    productive = [sym_id < n_terminals for sym_id in range(len(grammar.symbols))]
+    changed = True
+    while changed:
+        changed = False
+        for prod_id, right in enumerate(grammar.prod_right):
+            left = grammar.prod_left[prod_id]
+            if not productive[left] and all(productive[sym_id] for sym_id in right):
+                productive[left] = changed = True
+    return all(productive)
+
+
+def build_LALR_automaton_from_LR0(grammar):
+    """Build packed LALR(1) states without constructing the canonical LR(1) collection.
+
+    Builds the LR(0) automaton, then computes kernel lookaheads by spontaneous
+    generation and propagation (Dragon book, 4.7.5). The result has the same
+    states, numbering and transitions as merge_LR1_states.
+
+    That only holds when every non-terminal derives some terminal string.
+    LR(0) closure predicts non-productive non-terminals that LR(1) closure
+    never reaches, because their items get no lookahead. Those items add
+    gotos and change which states share a core. Grammars with
+    non-productive non-terminals are therefore built by merging the
+    canonical collection instead.
+    """
+    if not _all_productive(grammar):
+        logger.info("[LOG lalr_from_lr0_fallback] ========= Grammar has non-productive non-terminals, "
+                    "merging LR(1) states instead")
+        return merge_LR1_states(*build_LR1_automaton(grammar))
+
+    kernels, lr0_states, transitions = build_LR0_automaton(grammar)
+    prod_right = grammar.prod_right
+
+    # Placeholder lookahead used to discover which lookaheads propagate;
+    # no symbol has this ID
+    propagate = len(grammar.symbols)
+
+    lookaheads = {}  # (state_id, prod_id, dot) -> set of terminal IDs
+    propagates = defaultdict(list)  # (state_id, prod_id, dot) -> [(state_id, prod_id, dot)]
+    for sid, kernel in enumerate(kernels):
+        for prod_id, dot, _ in kernel:
+            lookaheads[(sid, prod_id, dot)] = set()
+
+    lookaheads[(0, 0, 0)].add(grammar.end_id)
+
+    # Discover spontaneous lookaheads and propagation links
+    for sid, kernel in enumerate(kernels):
+        for k_prod, k_dot, _ in kernel:
+            probe = closure_ids({(k_prod, k_dot, propagate)}, grammar)
+            for prod_id, dot, la in probe:
+                right = prod_right[prod_id]
+                if dot >= len(right):
+                    continue
+                target = (transitions[(sid, right[dot])], prod_id, dot + 1)
+                if la == propagate:
+                    propagates[(sid, k_prod, k_dot)].append(target)
+                else:
+                    lookaheads[target].add(la)
+
+    # Propagate until nothing changes
+    worklist = [key for key, las in lookaheads.items() if las]
+    while worklist:
+        source = worklist.pop()
+        source_las = lookaheads[source]
+        for target in propagates[source]:
+            target_las = lookaheads[target]
+            if not source_las <= target_las:
+                target_las |= source_las
+                worklist.append(target)
+
+    lalr_states = []
+    for sid, kernel in enumerate(kernels):
+        kernel_items = {
+            (prod_id, dot, la)
+            for prod_id, dot, _ in kernel
+            for la in lookaheads[(sid, prod_id, dot)]
+        }
+        lalr_states.append(closure_ids(kernel_items, grammar))
+
+    logger.info(f"[LOG lalr_states_built] ========= Built LALR(1) states: {len(lalr_states)} (from {len(lr0_states)} LR(0) states)")
+
+    return lalr_states, transitions
+
+
+def build_LALR_states_from_LR0(grammar):
+    states, transitions = build_LALR_automaton_from_LR0(grammar)
+    return decode_automaton(states, transitions, grammar)
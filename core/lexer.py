@@ -0,0 +1,135 @@
+# core/lexer.py
+
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Token classes as (terminal name, regex). A class is only active when the
+# grammar has a terminal of that name; a lexeme it matches that is also a
+# literal terminal (a keyword) is emitted as that terminal.
+DEFAULT_TOKEN_CLASSES = (
+    ('id', r'[A-Za-z][A-Za-z0-9]*'),
+    ('num', r'[0-9]+'),
+)
+
+UNKNOWN = -1
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+# --------------------------------------------------
+# LEXER
+# --------------------------------------------------
+
+class Lexer:
+    """Longest-match tokenizer compiled once from a set of terminal names.
+
+    Literal terminals are matched by a single alternation regex (longest
+    literals first), token classes by their own regexes, and the longest
+    match wins, with literals winning ties. Tokens are (term_id, text, start)
+    tuples; characters that match nothing become UNKNOWN tokens.
+    """
+
+    def __init__(self, terminal_ids: dict, end_id: int, token_classes=DEFAULT_TOKEN_CLASSES):
+        self.terminal_ids = terminal_ids
+        self.end_id = end_id
+
+        self.classes = [
+            (terminal_ids[name], re.compile(pattern))
+            for name, pattern in token_classes
+            if name in terminal_ids
+        ]
+        class_names = {name for name, _ in token_classes if name in terminal_ids}
+
+        self.literals = {
+            name: term_id for name, term_id in terminal_ids.items()
+            if term_id != end_id and name not in class_names
+        }
+        ordered = sorted(self.literals, key=len, reverse=True)
+        self._literal_re = re.compile('|'.join(re.escape(name) for name in ordered)) if ordered else None
+        self.max_literal_len = len(ordered[0]) if ordered else 0
+
+    def _match(self, text, pos):
+        """Return (term_id, end) of the longest token at pos"""
+        best_id, best_end = UNKNOWN, pos + 1
+
+        if self._literal_re is not None:
+            m = self._literal_re.match(text, pos)
+            if m:
+                best_id, best_end = self.literals[m.group()], m.end()
+
+        for term_id, regex in self.classes:
+            m = regex.match(text, pos)
+            if m and (m.end() > best_end or best_id == UNKNOWN and m.end() > pos):
+                best_id, best_end = self.literals.get(m.group(), term_id), m.end()
+
+        return best_id, best_end
+
+    def _scan(self, text, pos, stop, offset):
+        """Yield tokens of text starting before stop; return the position reached"""
+        length = len(text)
+        while pos < stop:
+            m = _WHITESPACE.match(text, pos)
+            if m:
+                pos = m.end()
+                if pos >= stop:
+                    break
+
+            term_id, end = self._match(text, pos)
+            if stop < length and end >= length:
+                # The token could continue in the next chunk
+                break
+            if term_id == UNKNOWN:
+                logger.warning(f"[LOG tokenize_warning] ========= Unknown character '{text[pos]}'")
+            yield term_id, text[pos:end], offset + pos
+            pos = end
+        return pos
+
+    def tokens(self, text):
+        """Lazily yield the tokens of text, ending with the '$' token"""
+        yield from self._scan(text, 0, len(text), 0)
+        yield self.end_id, '$', len(text)
+
+    def scan(self, text, pos=0):
+        """Lazily yield the tokens of text from pos onwards, without '$'"""
+        yield from self._scan(text, pos, len(text), 0)
+
+    def token_ids(self, text):
+        """Lazily yield terminal IDs of text, ending with '$', for parse_tokens"""
+        for term_id, _, _ in self.tokens(text):
+            yield term_id
+
+    def tokens_from_chunks(self, chunks):
+        """Yield tokens from an iterable of text chunks, ending with '$'.
+
+        Only the unfinished tail of each chunk is kept between chunks, so
+        arbitrarily long inputs can be lexed without holding them in memory.
+        """
+        buffer = ''
+        offset = 0
+        for chunk in chunks:
+            buffer += chunk
+            # A token reaching the end of the buffer may continue in the next chunk
+            stop = len(buffer) - max(1, self.max_literal_len)
+            pos = yield from self._scan(buffer, 0, stop, offset)
+            buffer = buffer[pos:]
+            offset += pos
+
+        yield from self._scan(buffer, 0, len(buffer), offset)
+        yield self.end_id, '$', offset + len(buffer)
+
+
+# --------------------------------------------------
+# PER-GRAMMAR CACHE
+# --------------------------------------------------
+
+def compile_lexer(grammar, token_classes=DEFAULT_TOKEN_CLASSES):
+    """Return the Lexer for grammar's terminals, compiled once per grammar"""
+    key = tuple(token_classes)
+    lexer = grammar.lexer_cache.get(key)
+    if lexer is None:
+        terminal_ids = {grammar.symbols[t].name: t for t in range(grammar.n_terminals)}
+        lexer = Lexer(terminal_ids, grammar.end_id, key)
+        grammar.lexer_cache[key] = lexer
+    return lexer
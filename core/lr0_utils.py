@@ -0,0 +1,78 @@
+# core/lr0_utils.py
+
+from core.Item import NO_LOOKAHEAD
+from core.clr_utils import goto_kernels, decode_automaton
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# CLOSURE (LR(0))
+# --------------------------------------------------
+
+def closure_LR0(kernel, grammar):
+    """Return the LR(0) closure of a kernel of packed (prod_id, dot, NO_LOOKAHEAD) items"""
+    prod_right = grammar.prod_right
+    n_terminals = grammar.n_terminals
+
+    closure_set = set(kernel)
+    worklist = list(closure_set)
+    expanded = set()
+
+    while worklist:
+        prod_id, dot, _ = worklist.pop()
+        right = prod_right[prod_id]
+        if dot >= len(right) or right[dot] < n_terminals or right[dot] in expanded:
+            continue
+        expanded.add(right[dot])
+
+        for new_prod in grammar.prod_ids_by_left[right[dot]]:
+            new_item = (new_prod, 0, NO_LOOKAHEAD)
+            if new_item not in closure_set:
+                closure_set.add(new_item)
+                worklist.append(new_item)
+
+    return frozenset(closure_set)
+
+
+# --------------------------------------------------
+# BUILD LR(0) AUTOMATON
+# --------------------------------------------------
+
+def build_LR0_automaton(grammar):
+    """Build the LR(0) automaton over packed items.
+
+    Returns (kernels, states, transitions), where kernels[i] is the kernel item
+    set of states[i]. States are numbered in the same order as
+    build_LR1_automaton numbers the first canonical state of each core.
+    """
+    start_kernel = frozenset({(0, 0, NO_LOOKAHEAD)})
+
+    kernels = [start_kernel]
+    states = [closure_LR0(start_kernel, grammar)]
+    state_ids = {start_kernel: 0}
+    transitions = {}
+
+    i = 0
+    while i < len(states):
+        moved = goto_kernels(states[i], grammar)
+
+        for sym_id in sorted(moved):
+            kernel = frozenset(moved[sym_id])
+            target = state_ids.get(kernel)
+            if target is None:
+                target = state_ids[kernel] = len(states)
+                kernels.append(kernel)
+                states.append(closure_LR0(kernel, grammar))
+            transitions[(i, sym_id)] = target
+
+        i += 1
+
+    logger.info(f"[LOG lr0_states_built] ========= Built LR(0) states: {len(states)}")
+
+    return kernels, states, transitions
+
+
+def build_LR0_states(grammar):
+    _, states, transitions = build_LR0_automaton(grammar)
+    return decode_automaton(states, transitions, grammar)
@@ -0,0 +1,233 @@
+# core/modes.py
+
+from collections import deque
+from typing import NamedTuple
+from core.clr_utils import closure_ids, goto_kernels, build_LR1_automaton
+from core.lalr_utils import build_LALR_automaton_from_LR0
+from core.lr0_utils import build_LR0_automaton
+from core.grammar import bit_ids
+from core.tables import build_encoded_tables, unresolved_conflicts
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Construction modes, from the smallest automaton to the largest
+LR0 = 'lr0'
+SLR = 'slr'
+LALR = 'lalr'
+MINIMAL = 'minimal'
+CLR = 'clr'
+MODES = (LR0, SLR, LALR, MINIMAL, CLR)
+
+# --------------------------------------------------
+# LR(0) AND SLR(1)
+# --------------------------------------------------
+
+def _reduce_on(lr0_states, grammar, lookaheads):
+    """Give the completed items of packed LR(0) states the lookaheads lookaheads(prod_id).
+
+    Other items keep NO_LOOKAHEAD. The augmented start production only
+    completes on '$', where it accepts.
+    """
+    prod_right = grammar.prod_right
+    end_bits = 1 << grammar.end_id
+    states = []
+    for state in lr0_states:
+        items = set()
+        for prod_id, dot, la in state:
+            if dot < len(prod_right[prod_id]):
+                items.add((prod_id, dot, la))
+            else:
+                bits = end_bits if prod_id == 0 else lookaheads(prod_id)
+                items.update((prod_id, dot, t) for t in bit_ids(bits))
+        states.append(frozenset(items))
+    return states
+
+
+def build_LR0_table_automaton(grammar):
+    """LR(0) automaton whose completed items reduce on every terminal"""
+    _, states, transitions = build_LR0_automaton(grammar)
+    all_terminals = (1 << grammar.n_terminals) - 1
+    return _reduce_on(states, grammar, lambda prod_id: all_terminals), transitions
+
+
+def build_SLR_automaton(grammar):
+    """LR(0) automaton whose completed items reduce on FOLLOW of their LHS"""
+    _, states, transitions = build_LR0_automaton(grammar)
+    follow_bits, prod_left = grammar.follow_bits, grammar.prod_left
+    return _reduce_on(states, grammar, lambda prod_id: follow_bits[prod_left[prod_id]]), transitions
+
+
+# --------------------------------------------------
+# MINIMAL LR(1) (PAGER)
+# --------------------------------------------------
+
+def _weakly_compatible(core, las, other):
+    """Pager's weak compatibility of two kernels with the same core.
+
+    Merging can only introduce a reduce/reduce conflict that neither kernel
+    has when a lookahead of one item in one kernel meets a lookahead of
+    another item in the other kernel, and the two items share no lookahead
+    within either kernel.
+    """
+    items = sorted(core)
+    for i, a in enumerate(items):
+        for b in items[i + 1:]:
+            if (las[a] & other[b]) | (other[a] & las[b]) and not las[a] & las[b] and not other[a] & other[b]:
+                return False
+    return True
+
+
+def build_minimal_LR1_automaton(grammar, progress=None):
+    """Build an LR(1) automaton merging states whenever Pager's weak compatibility allows.
+
+    A goto kernel reuses a state with the same core whose lookaheads contain
+    its own, or merges into the first weakly compatible one, which is then
+    expanded again with the grown lookaheads. Only states whose merge could
+    add a reduce/reduce conflict stay split, so the result has about as many
+    states as LALR(1) without LALR's extra conflicts. Unreachable states left
+    by merges are dropped and the rest numbered breadth-first in symbol order.
+    """
+    kernel_las = []  # per state: {(prod_id, dot): lookahead bits}
+    by_core = {}
+    transitions = {}
+    queue = deque()
+    queued = set()
+
+    def add_state(las):
+        sid = len(kernel_las)
+        kernel_las.append(las)
+        by_core.setdefault(frozenset(las), []).append(sid)
+        queue.append(sid)
+        queued.add(sid)
+        return sid
+
+    add_state({(0, 0): 1 << grammar.end_id})
+
+    while queue:
+        if progress is not None:
+            progress.update(len(kernel_las), len(queue))
+        sid = queue.popleft()
+        queued.discard(sid)
+        kernel = frozenset(
+            (prod_id, dot, la)
+            for (prod_id, dot), bits in kernel_las[sid].items()
+            for la in bit_ids(bits)
+        )
+        moved = goto_kernels(closure_ids(kernel, grammar), grammar)
+
+        for sym_id in sorted(moved):
+            las = {}
+            for prod_id, dot, la in moved[sym_id]:
+                las[(prod_id, dot)] = las.get((prod_id, dot), 0) | (1 << la)
+            core = frozenset(las)
+            candidates = by_core.get(core, ())
+
+            target = next(
+                (cand for cand in candidates
+                 if all(bits & ~kernel_las[cand][c] == 0 for c, bits in las.items())),
+                None,
+            )
+            if target is None:
+                target = next((cand for cand in candidates if _weakly_compatible(core, kernel_las[cand], las)), None)
+                if target is not None:
+                    merged = kernel_las[target]
+                    for c, bits in las.items():
+                        merged[c] |= bits
+                    if target not in queued:
+                        queue.append(target)
+                        queued.add(target)
+                else:
+                    target = add_state(las)
+            transitions[(sid, sym_id)] = target
+
+    # Renumber the reachable states breadth-first, visiting symbols in ID order
+    out = [[] for _ in kernel_las]
+    for (sid, sym_id), target in transitions.items():
+        out[sid].append((sym_id, target))
+    order = [0]
+    new_ids = {0: 0}
+    for sid in order:
+        for _, target in sorted(out[sid]):
+            if target not in new_ids:
+                new_ids[target] = len(order)
+                order.append(target)
+
+    states = [
+        closure_ids(frozenset(
+            (prod_id, dot, la)
+            for (prod_id, dot), bits in kernel_las[sid].items()
+            for la in bit_ids(bits)
+        ), grammar)
+        for sid in order
+    ]
+    renumbered = {
+        (new_ids[sid], sym_id): new_ids[target]
+        for sid in order
+        for sym_id, target in sorted(out[sid])
+    }
+
+    logger.info(f"[LOG minimal_lr1_built] ========= Built minimal LR(1) states: {len(states)} "
+                f"({len(kernel_las) - len(states)} dropped after merging)")
+    return states, renumbered
+
+
+# --------------------------------------------------
+# MODE SELECTION
+# --------------------------------------------------
+
+class ModeReport(NamedTuple):
+    mode: str
+    n_states: int
+    table_cells: int
+    table_bytes: int
+    build_seconds: float
+    conflicts: int
+    unresolved_conflicts: int
+
+
+def build_mode_automaton(grammar, mode, progress=None):
+    """Return the packed (states, transitions) of grammar in the given construction mode"""
+    if mode == LR0:
+        return build_LR0_table_automaton(grammar)
+    if mode == SLR:
+        return build_SLR_automaton(grammar)
+    if mode == LALR:
+        return build_LALR_automaton_from_LR0(grammar)
+    if mode == MINIMAL:
+        return build_minimal_LR1_automaton(grammar, progress)
+    if mode == CLR:
+        return build_LR1_automaton(grammar, progress)
+    raise ValueError(f"Unknown construction mode: {mode}")
+
+
+def report_mode(grammar, mode, progress=None):
+    """Build grammar in mode and return (states, transitions, tables, ModeReport)"""
+    started = time.perf_counter()
+    states, transitions = build_mode_automaton(grammar, mode, progress)
+    tables = build_encoded_tables(states, transitions, grammar)
+    elapsed = time.perf_counter() - started
+
+    cells = tables.n_states * (tables.n_terminals + tables.n_non_terminals)
+    report = ModeReport(
+        mode, tables.n_states, cells, cells * tables.action.itemsize, round(elapsed, 6),
+        len(tables.conflicts), len(unresolved_conflicts(tables)),
+    )
+    return states, transitions, tables, report
+
+
+def compare_modes(grammar, modes=MODES, progress=None):
+    """Build grammar in each mode and return {mode: ModeReport}"""
+    reports = {}
+    for mode in modes:
+        reports[mode] = report_mode(grammar, mode, progress)[3]
+        logger.info(f"[LOG mode_compared] ========= {mode}: {reports[mode].n_states} states, "
+                    f"{reports[mode].unresolved_conflicts} unresolved conflicts")
+    return reports
+
+
+def smallest_conflict_free(reports):
+    """The mode with the fewest states among those without unresolved conflicts, or None"""
+    free = [report for report in reports.values() if report.unresolved_conflicts == 0]
+    return min(free, key=lambda report: report.n_states).mode if free else None
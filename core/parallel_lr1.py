@@ -0,0 +1,85 @@
+# core/parallel_lr1.py
+
+from core.clr_utils import closure_ids, goto_kernels, build_LR1_automaton
+from core.pools import shared_pool, shared_payload, load_payload, cached_state
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Below this many new states in a BFS level the level is expanded in this process
+MIN_PARALLEL_KERNELS = 32
+
+# --------------------------------------------------
+# WORKERS
+# --------------------------------------------------
+
+def _expand(kernel, grammar):
+    """Closure of a kernel and its goto kernels as [(sym_id, kernel)] in symbol order"""
+    state = closure_ids(kernel, grammar)
+    moved = goto_kernels(state, grammar)
+    return state, [(sym_id, frozenset(moved[sym_id])) for sym_id in sorted(moved)]
+
+
+def _expand_chunk(args):
+    # The grammar is unpickled once per worker and build
+    key, path, kernels = args
+    grammar = cached_state(key, lambda: load_payload(path))
+    return [_expand(kernel, grammar) for kernel in kernels]
+
+
+# --------------------------------------------------
+# LEVEL-SYNCHRONOUS BUILD
+# --------------------------------------------------
+
+def build_LR1_automaton_parallel(grammar, workers=None, progress=None):
+    """Build the canonical LR(1) collection, expanding each BFS level in a process pool.
+
+    Every state of a level gets its closure and goto kernels computed by a
+    worker of the process's shared pool (see shared_pool); the kernels are
+    then numbered here, in state and symbol order, so states and
+    transitions are identical to build_LR1_automaton's. Small levels are
+    expanded in this process. With fewer than two workers this is
+    build_LR1_automaton.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 2:
+        return build_LR1_automaton(grammar, progress)
+
+    key, path = shared_payload(grammar)
+    pool = shared_pool(workers)
+
+    start_kernel = frozenset({(0, 0, grammar.end_id)})
+    states = []
+    state_ids = {start_kernel: 0}
+    level = [start_kernel]
+    transitions = {}
+    levels = 0
+
+    while level:
+        if progress is not None:
+            progress.update(len(state_ids), len(level))
+        if len(level) < MIN_PARALLEL_KERNELS:
+            expanded = (_expand(kernel, grammar) for kernel in level)
+        else:
+            chunk_size = max(1, len(level) // (workers * 4))
+            chunks = [(key, path, level[i:i + chunk_size]) for i in range(0, len(level), chunk_size)]
+            expanded = (result for chunk in pool.imap(_expand_chunk, chunks) for result in chunk)
+
+        # States of this level keep the IDs they were discovered with, so
+        # numbering the new kernels in source order matches the sequential build
+        next_level = []
+        for state, moved in expanded:
+            sid = len(states)
+            states.append(state)
+            for sym_id, kernel in moved:
+                target = state_ids.get(kernel)
+                if target is None:
+                    target = state_ids[kernel] = len(state_ids)
+                    next_level.append(kernel)
+                transitions[(sid, sym_id)] = target
+        level = next_level
+        levels += 1
+
+    logger.info(f"[LOG lr1_parallel] ========= Built {len(states)} LR(1) states in {levels} levels on {workers} workers")
+    return states, transitions
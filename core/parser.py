@@ -0,0 +1,243 @@
+# core/parser.py
+
+from core.tables import ACCEPT
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# RESULT
+# --------------------------------------------------
+
+class ParseResult:
+    def __init__(self, accepted: bool, position: int, state: int = None, token: int = None, steps=None):
+        self.accepted = accepted
+        self.position = position  # index of the token where parsing stopped
+        self.state = state        # state and token ID of the error, if any
+        self.token = token
+        self.steps = steps
+
+    def error_message(self, grammar):
+        if self.accepted:
+            return None
+        return f"Error at state {self.state}, token {token_name(grammar, self.token)}"
+
+    def __repr__(self):
+        if self.accepted:
+            return f"ParseResult(accepted, {self.position} tokens)"
+        return f"ParseResult(error at token {self.position}, state {self.state})"
+
+
+def token_name(grammar, token):
+    if token is None or token < 0:
+        return '<unknown>'
+    return str(grammar.symbols[token])
+
+
+def terminal_ids(tokens, grammar):
+    """Map Terminal tokens (as returned by tokenize) to terminal IDs, -1 if unknown"""
+    ids = []
+    for tok in tokens:
+        sym_id = grammar.symbol_ids.get(tok, -1)
+        ids.append(sym_id if sym_id < grammar.n_terminals else -1)
+    return ids
+
+
+# --------------------------------------------------
+# DRIVER
+# --------------------------------------------------
+
+def parse_tokens(tables, tokens, recorder=None):
+    """Run the LR driver over an iterable of terminal IDs ending with '$'.
+
+    tables is a ParseTables. Runs in time linear in the number of tokens and
+    never materializes the input. If recorder is given it is called before
+    each action as recorder(kind, position, arg, target):
+
+        ('shift', pos, term_id, new_state)
+        ('reduce', pos, prod_id, goto_state)
+        ('accept', pos, None, None)
+        ('error', pos, term_id, state)
+    """
+    action = tables.action
+    goto = tables.goto
+    prod_left = tables.prod_left
+    prod_len = tables.prod_len
+    n_terminals = tables.n_terminals
+    n_non_terminals = tables.n_non_terminals
+
+    stack = [0]
+    tokens = iter(tokens)
+    token = next(tokens, -1)
+    position = 0
+
+    while True:
+        state = stack[-1]
+        code = action[state * n_terminals + token] if 0 <= token < n_terminals else 0
+
+        if code > 0:
+            if recorder is not None:
+                recorder('shift', position, token, code - 1)
+            stack.append(code - 1)
+            token = next(tokens, -1)
+            position += 1
+
+        elif code < ACCEPT:
+            prod_id = -code - 1
+            rhs_len = prod_len[prod_id]
+            if rhs_len:
+                del stack[-rhs_len:]
+            target = goto[stack[-1] * n_non_terminals + prod_left[prod_id]]
+            if recorder is not None:
+                recorder('reduce', position, prod_id, target)
+            stack.append(target)
+
+        elif code == ACCEPT:
+            if recorder is not None:
+                recorder('accept', position, None, None)
+            return ParseResult(True, position)
+
+        else:
+            if recorder is not None:
+                recorder('error', position, token, state)
+            return ParseResult(False, position, state, token)
+
+
+# --------------------------------------------------
+# PUSH PARSER
+# --------------------------------------------------
+
+class PushParser:
+    """LR driver that is fed one terminal ID at a time.
+
+    Use it when tokens arrive over time or the input is too large to hold:
+    call feed(term_id) per token and finish() at end of input, which feeds
+    end_id ('$') and returns the ParseResult. feed returns False once the
+    parse has ended (on error, or accept if '$' was fed directly); later
+    feeds are ignored. Memory is the parse stack only, and max_depth bounds
+    it: deeper nesting raises OverflowError instead of growing without
+    limit. listener, if given, receives the same events as a parse_tokens
+    recorder.
+    """
+
+    def __init__(self, tables, end_id, listener=None, max_depth=None):
+        self.tables = tables
+        self.end_id = end_id
+        self.listener = listener
+        self.max_depth = max_depth
+        self.stack = [0]
+        self.position = 0
+        self.result = None
+
+    def feed(self, token):
+        if self.result is not None:
+            return False
+
+        tables = self.tables
+        action = tables.action
+        n_terminals = tables.n_terminals
+        stack = self.stack
+        listener = self.listener
+
+        while True:
+            state = stack[-1]
+            code = action[state * n_terminals + token] if 0 <= token < n_terminals else 0
+
+            if code > 0:
+                self._check_push(0)
+                if listener is not None:
+                    listener('shift', self.position, token, code - 1)
+                stack.append(code - 1)
+                self.position += 1
+                return True
+
+            elif code < ACCEPT:
+                prod_id = -code - 1
+                rhs_len = tables.prod_len[prod_id]
+                # Empty reductions grow the stack too
+                self._check_push(rhs_len)
+                if rhs_len:
+                    del stack[-rhs_len:]
+                target = tables.goto[stack[-1] * tables.n_non_terminals + tables.prod_left[prod_id]]
+                if listener is not None:
+                    listener('reduce', self.position, prod_id, target)
+                stack.append(target)
+
+            elif code == ACCEPT:
+                if listener is not None:
+                    listener('accept', self.position, None, None)
+                self.result = ParseResult(True, self.position)
+                return False
+
+            else:
+                if listener is not None:
+                    listener('error', self.position, token, state)
+                self.result = ParseResult(False, self.position, state, token)
+                return False
+
+    def _check_push(self, popped):
+        """Raise OverflowError, leaving the stack as it is, if popping popped states and pushing one exceeds max_depth"""
+        if self.max_depth is not None and len(self.stack) - popped >= self.max_depth:
+            raise OverflowError(f"Parse stack would exceed {self.max_depth} states at token {self.position}")
+
+    def finish(self):
+        """Signal end of input and return the ParseResult"""
+        if self.result is None:
+            self.feed(self.end_id)
+        if self.result is None:
+            # Only reachable with tables that shift '$'
+            self.result = ParseResult(False, self.position, self.stack[-1], self.end_id)
+        return self.result
+
+    @property
+    def depth(self):
+        return len(self.stack)
+
+
+# --------------------------------------------------
+# STEP TRACES
+# --------------------------------------------------
+
+class TraceRecorder:
+    """Recorder for parse_tokens that keeps visualizer step records.
+
+    Each step is a dict with the symbol stack and remaining input before the
+    action, and a description of the action. Building the remaining input
+    makes tracing quadratic, so it is meant for short visualizer inputs only.
+    """
+
+    def __init__(self, grammar, tokens):
+        self.grammar = grammar
+        self.tokens = tokens
+        self.steps = []
+        self._symbols = []
+
+    def __call__(self, kind, position, arg, target):
+        grammar = self.grammar
+        stack = ' '.join(self._symbols) if self._symbols else 'ε'
+        remaining = ' '.join(token_name(grammar, t) for t in self.tokens[position:])
+
+        if kind == 'shift':
+            name = token_name(grammar, arg)
+            description = f"Shift {name}, push {target}"
+            self._symbols.append(name)
+        elif kind == 'reduce':
+            prod = grammar.productions[arg]
+            description = f"Reduce {prod}, goto {target}"
+            if prod.right:
+                del self._symbols[-len(prod.right):]
+            self._symbols.append(str(prod.left))
+        elif kind == 'accept':
+            description = "✅ Input accepted"
+        else:
+            description = f"❌ Error at state {target}, token {token_name(grammar, arg)}"
+
+        self.steps.append({'stack': stack, 'input': remaining, 'action': description})
+
+
+def parse_with_trace(tables, tokens, grammar):
+    """Parse a list of terminal IDs and attach visualizer steps to the result"""
+    recorder = TraceRecorder(grammar, tokens)
+    result = parse_tokens(tables, tokens, recorder)
+    result.steps = recorder.steps
+    return result
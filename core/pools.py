@@ -0,0 +1,107 @@
+# core/pools.py
+
+import atexit
+import hashlib
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# SHARED PROCESS POOLS
+# --------------------------------------------------
+
+# One pool per worker count, kept for the life of the process
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def shared_pool(workers):
+    """The process's pool of worker processes, started on first use.
+
+    Workers come from forkserver (or spawn), never from forking this
+    process, which may be a threaded server holding locks in other threads.
+    Tasks must carry whatever state they need; see cached_state.
+    """
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            pool = _pools[workers] = context.Pool(workers)
+            logger.info(f"[LOG shared_pool] ========= Started shared pool of {workers} workers")
+        return pool
+
+
+@atexit.register
+def _close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.terminate()
+        _pools.clear()
+        if _payload_dir is not None:
+            shutil.rmtree(_payload_dir, ignore_errors=True)
+
+
+# --------------------------------------------------
+# TASK PAYLOADS
+# --------------------------------------------------
+
+# Pickled task state written to a private directory once, so tasks carry
+# its path instead of the bytes; key -> path, most recently used last
+MAX_PAYLOADS = 64
+_payloads = {}
+_payload_dir = None
+
+
+def shared_payload(obj):
+    """(key, path) of a file holding obj pickled, written once per distinct pickle.
+
+    Workers read it with load_payload, under key in cached_state. Files
+    are removed when MAX_PAYLOADS newer ones exist or the process exits.
+    """
+    global _payload_dir
+    data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    key = hashlib.sha256(data).hexdigest()
+    with _pools_lock:
+        path = _payloads.pop(key, None)
+        if path is None:
+            if _payload_dir is None:
+                _payload_dir = tempfile.mkdtemp(prefix='lr-payloads-')
+            path = os.path.join(_payload_dir, f'{key}.pickle')
+            with open(path, 'wb') as f:
+                f.write(data)
+            if len(_payloads) >= MAX_PAYLOADS:
+                os.remove(_payloads.pop(next(iter(_payloads))))
+        _payloads[key] = path
+    return key, path
+
+
+def load_payload(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+# --------------------------------------------------
+# WORKER STATE
+# --------------------------------------------------
+
+# Per worker process: key -> loaded state, most recently used last
+MAX_WORKER_STATES = 8
+_worker_states = {}
+
+
+def cached_state(key, load):
+    """The state stored under key in this worker, calling load() on first use"""
+    state = _worker_states.pop(key, None)
+    if state is None:
+        state = load()
+        if len(_worker_states) >= MAX_WORKER_STATES:
+            del _worker_states[next(iter(_worker_states))]
+    _worker_states[key] = state
+    return state
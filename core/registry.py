@@ -0,0 +1,84 @@
+# core/registry.py
+
+from typing import NamedTuple
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# ENTRIES
+# --------------------------------------------------
+
+class GrammarEntry(NamedTuple):
+    """Everything needed to parse with a built grammar, shared across threads.
+
+    The fields are never reassigned and the tables are read-only, but the
+    grammar fills its caches (closure_cache, lexer_cache, item_text_cache)
+    on demand from any thread. Each cache write is a single dict store of a
+    value that depends only on its key, so racing threads at worst compute
+    the same value twice.
+    """
+    grammar_id: str
+    grammar: object
+    tables: object
+    lexer: object
+
+
+# --------------------------------------------------
+# REGISTRY
+# --------------------------------------------------
+
+class GrammarRegistry:
+    """Thread-safe map from grammar ID to GrammarEntry with TTL eviction.
+
+    Entries not used for ttl seconds are dropped; when more than max_entries
+    are live the least recently used go first. On a miss, loader(grammar_id)
+    may supply the entry (e.g. from a table artifact written by another
+    process); it returns None if the ID is unknown.
+    """
+
+    def __init__(self, ttl=3600, max_entries=1024, loader=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.loader = loader
+        self._entries = {}  # grammar_id -> (entry, last_used)
+        self._lock = threading.Lock()
+
+    def register(self, entry):
+        with self._lock:
+            self._entries[entry.grammar_id] = (entry, time.monotonic())
+            self._evict()
+        return entry.grammar_id
+
+    def get(self, grammar_id):
+        now = time.monotonic()
+        with self._lock:
+            found = self._entries.get(grammar_id)
+            if found is not None and now - found[1] <= self.ttl:
+                self._entries[grammar_id] = (found[0], now)
+                return found[0]
+
+        if self.loader is None:
+            return None
+        entry = self.loader(grammar_id)
+        if entry is not None:
+            logger.info(f"[LOG registry_load] ========= Loaded grammar {grammar_id[:12]} on demand")
+            self.register(entry)
+        return entry
+
+    def _evict(self):
+        now = time.monotonic()
+        expired = [gid for gid, (_, used) in self._entries.items() if now - used > self.ttl]
+        for gid in expired:
+            del self._entries[gid]
+
+        if len(self._entries) > self.max_entries:
+            by_age = sorted(self._entries, key=lambda gid: self._entries[gid][1])
+            for gid in by_age[:len(self._entries) - self.max_entries]:
+                del self._entries[gid]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
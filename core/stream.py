@@ -0,0 +1,100 @@
+# core/stream.py
+
+import json
+import zlib
+import logging
+
+try:
+    import zstandard
+except ImportError:  # zstd is only offered when the zstandard package is installed
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Bytes buffered before a chunk is handed to the response
+CHUNK_SIZE = 64 * 1024
+
+# --------------------------------------------------
+# STREAMED VALUES
+# --------------------------------------------------
+
+class StreamedList:
+    """A JSON array whose elements are produced by an iterable while writing"""
+
+    def __init__(self, items):
+        self.items = items
+
+
+class StreamedDict:
+    """A JSON object whose (key, value) pairs are produced by an iterable while writing"""
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+
+
+def _encode(value):
+    """Yield the JSON text of value, expanding StreamedList and StreamedDict lazily"""
+    if isinstance(value, StreamedList):
+        yield '['
+        for i, item in enumerate(value.items):
+            if i:
+                yield ','
+            yield from _encode(item)
+        yield ']'
+    elif isinstance(value, StreamedDict):
+        yield '{'
+        for i, (key, item) in enumerate(value.pairs):
+            yield f'{"," if i else ""}{json.dumps(str(key), ensure_ascii=False)}:'
+            yield from _encode(item)
+        yield '}'
+    else:
+        yield json.dumps(value, ensure_ascii=False)
+
+
+def json_chunks(value, chunk_size=CHUNK_SIZE):
+    """Yield value as UTF-8 JSON in chunks of about chunk_size bytes.
+
+    Only the current element of each StreamedList/StreamedDict is held in
+    memory, so the whole document never is.
+    """
+    buffer = []
+    size = 0
+    for text in _encode(value):
+        buffer.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+# --------------------------------------------------
+# COMPRESSION
+# --------------------------------------------------
+
+def supported_encodings():
+    """Content codings compress_chunks accepts, most preferred first"""
+    if zstandard is not None:
+        return ('zstd', 'gzip', 'identity')
+    return ('gzip', 'identity')
+
+
+def compress_chunks(chunks, encoding):
+    """Compress a stream of byte chunks with 'zstd', 'gzip' or 'identity'"""
+    if encoding == 'identity':
+        yield from chunks
+        return
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    elif encoding == 'zstd' and zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    else:
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,234 @@
+# core/tables.py
+
+from array import array
+from typing import NamedTuple
+from core.grammar import LEFT, RIGHT
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# ACTION ENCODING
+# --------------------------------------------------
+# ACTION cells hold signed ints:
+#   0      error
+#   s + 1  shift and go to state s
+#   -(p+1) reduce by production p
+# Reducing by the augmented start production (p = 0) is accept.
+
+ERROR = 0
+ACCEPT = -1
+
+
+def encode_shift(target):
+    return target + 1
+
+
+def encode_reduce(prod_id):
+    return -(prod_id + 1)
+
+
+def decode_action(code):
+    """Return ('shift', state), ('reduce', prod_id), ('accept', None) or ('error', None)"""
+    if code > 0:
+        return 'shift', code - 1
+    if code == ACCEPT:
+        return 'accept', None
+    if code < 0:
+        return 'reduce', -code - 1
+    return 'error', None
+
+
+# --------------------------------------------------
+# CONFLICTS
+# --------------------------------------------------
+
+SHIFT_REDUCE = 'shift/reduce'
+REDUCE_REDUCE = 'reduce/reduce'
+
+# How the action of a conflicted cell was chosen
+BY_PRECEDENCE = 'precedence'
+BY_DEFAULT = 'default'
+
+
+class Conflict(NamedTuple):
+    """A table cell with more than one possible action.
+
+    actions holds every competing encoded action (the shift first, then the
+    reduces by production ID) and items the packed items behind them.
+    chosen is the action written to the table (ERROR for a nonassoc
+    operator) and resolved_by tells whether declared precedence or the
+    default rules picked it.
+    """
+    state: int
+    terminal: int
+    kind: str
+    actions: tuple
+    items: tuple
+    chosen: int
+    resolved_by: str
+
+
+def _resolve(shift, prod_ids, term_id, term_prec, prod_prec):
+    """Return (chosen action, BY_PRECEDENCE or BY_DEFAULT) for a conflicted cell"""
+    reduce = encode_reduce(prod_ids[0])
+    if shift == ERROR:
+        return reduce, BY_DEFAULT
+
+    term = term_prec.get(term_id)
+    prod = prod_prec[prod_ids[0]]
+    if term is None or prod is None:
+        return shift, BY_DEFAULT
+    if prod[0] != term[0]:
+        return (reduce if prod[0] > term[0] else shift), BY_PRECEDENCE
+    if term[1] == LEFT:
+        return reduce, BY_PRECEDENCE
+    if term[1] == RIGHT:
+        return shift, BY_PRECEDENCE
+    return ERROR, BY_PRECEDENCE
+
+
+def _conflict_items(state, prod_right, term_id, prod_ids):
+    """The completed items reducing on term_id and the items shifting it"""
+    return tuple(sorted(
+        (prod_id, dot, la) for prod_id, dot, la in state
+        if (dot == len(prod_right[prod_id]) and la == term_id and prod_id in prod_ids)
+        or (dot < len(prod_right[prod_id]) and prod_right[prod_id][dot] == term_id)
+    ))
+
+
+def unresolved_conflicts(tables):
+    """Conflicts of tables that no precedence declaration settled, in state order"""
+    return [tables.conflicts[key] for key in sorted(tables.conflicts)
+            if tables.conflicts[key].resolved_by == BY_DEFAULT]
+
+
+# --------------------------------------------------
+# DENSE TABLES
+# --------------------------------------------------
+
+class ParseTables:
+    """ACTION and GOTO as flat row-major int arrays.
+
+    action[state * n_terminals + term_id] is an encoded action and
+    goto[state * n_non_terminals + nt_index] is a target state or -1, where
+    nt_index = sym_id - n_terminals. prod_left[p] is the nt_index of the LHS
+    of production p and prod_len[p] the length of its RHS. conflicts maps
+    (state, term_id) to the Conflict of each cell that had several actions.
+    """
+
+    def __init__(self, n_states, n_terminals, n_non_terminals, action, goto, prod_left, prod_len, conflicts=None):
+        self.n_states = n_states
+        self.n_terminals = n_terminals
+        self.n_non_terminals = n_non_terminals
+        self.action = action
+        self.goto = goto
+        self.prod_left = prod_left
+        self.prod_len = prod_len
+        self.conflicts = conflicts if conflicts is not None else {}
+
+    def action_at(self, state, term_id):
+        return self.action[state * self.n_terminals + term_id]
+
+    def goto_at(self, state, nt_index):
+        return self.goto[state * self.n_non_terminals + nt_index]
+
+
+def build_encoded_tables(states, transitions, grammar):
+    """Build ParseTables from a packed automaton (see build_LR1_automaton).
+
+    Every shift/reduce and reduce/reduce conflict is recorded in
+    tables.conflicts. They are resolved the yacc way: a shift/reduce
+    conflict between a production and a terminal that both have a declared
+    precedence (see Grammar.set_precedence) goes to the higher one, or by
+    the terminal's associativity at equal levels; otherwise shift wins over
+    reduce, and the production listed first wins a reduce/reduce conflict.
+    """
+    n_states = len(states)
+    n_terminals = grammar.n_terminals
+    n_non_terminals = len(grammar.symbols) - n_terminals
+
+    action = array('i', bytes(4 * n_states * n_terminals))
+    goto = array('i', [-1]) * (n_states * n_non_terminals)
+
+    for (sid, sym_id), target in transitions.items():
+        if sym_id < n_terminals:
+            action[sid * n_terminals + sym_id] = encode_shift(target)
+        else:
+            goto[sid * n_non_terminals + sym_id - n_terminals] = target
+
+    prod_right = grammar.prod_right
+    term_prec, prod_prec = grammar.precedence_ids()
+    conflicts = {}
+    for sid, state in enumerate(states):
+        row = sid * n_terminals
+        reduces = {}
+        for prod_id, dot, la in state:
+            if dot == len(prod_right[prod_id]):
+                reduces.setdefault(la, []).append(prod_id)
+
+        for la, prod_ids in reduces.items():
+            cell = row + la
+            shift = action[cell]
+            if shift == ERROR and len(prod_ids) == 1:
+                action[cell] = encode_reduce(prod_ids[0])
+                continue
+
+            prod_ids.sort()
+            chosen, resolved_by = _resolve(shift, prod_ids, la, term_prec, prod_prec)
+            action[cell] = chosen
+            competing = ((shift,) if shift != ERROR else ()) + tuple(encode_reduce(p) for p in prod_ids)
+            conflicts[(sid, la)] = Conflict(
+                sid, la, SHIFT_REDUCE if shift != ERROR else REDUCE_REDUCE, competing,
+                _conflict_items(state, prod_right, la, prod_ids), chosen, resolved_by,
+            )
+
+    prod_left = array('i', (left - n_terminals for left in grammar.prod_left))
+    prod_len = array('i', (len(right) for right in prod_right))
+
+    logger.info(f"[LOG tables_built] ========= Built dense tables: {n_states} states x {n_terminals} terminals")
+    unresolved = sum(conflict.resolved_by == BY_DEFAULT for conflict in conflicts.values())
+    if unresolved:
+        logger.warning(f"[LOG tables_conflicts] ========= {unresolved} conflicts resolved by default rules "
+                       f"({len(conflicts) - unresolved} by precedence)")
+
+    return ParseTables(n_states, n_terminals, n_non_terminals, action, goto, prod_left, prod_len, conflicts)
+
+
+# --------------------------------------------------
+# STRING FORM (VISUALIZER)
+# --------------------------------------------------
+
+def action_text(code, grammar):
+    """Return the string form of an encoded action: S(state), R(production), ACC or '' for errors"""
+    kind, arg = decode_action(code)
+    if kind == 'shift':
+        return f"S({arg})"
+    if kind == 'reduce':
+        return f"R({grammar.productions[arg]})"
+    if kind == 'accept':
+        return 'ACC'
+    return ''
+
+
+def decode_tables(tables, grammar, start=0, stop=None):
+    """Return (ACTION, GOTO) dicts in the string form of build_parsing_tables.
+
+    Only the rows of states start..stop-1 are decoded (all by default).
+    """
+    symbols = grammar.symbols
+    ACTION = {}
+    GOTO = {}
+
+    for sid in range(start, tables.n_states if stop is None else stop):
+        for term_id in range(tables.n_terminals):
+            code = tables.action_at(sid, term_id)
+            if code != ERROR:
+                ACTION[(sid, symbols[term_id])] = action_text(code, grammar)
+
+        for nt_index in range(tables.n_non_terminals):
+            target = tables.goto_at(sid, nt_index)
+            if target >= 0:
+                GOTO[(sid, symbols[tables.n_terminals + nt_index])] = target
+
+    return ACTION, GOTO
@@ -0,0 +1,132 @@
+# core/tree.py
+
+from array import array
+from core.parser import parse_tokens
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --------------------------------------------------
+# ARENA
+# --------------------------------------------------
+
+class ParseTree:
+    """Parse tree stored as parallel int arrays indexed by node ID.
+
+    symbol[n] is the node's symbol ID and child_count[n] its number of
+    children, which are children[child_start[n]:child_start[n] + child_count[n]].
+    Leaves are the nodes whose symbol is a terminal (ID below n_terminals);
+    for them child_start[n] holds the position of the token in the input.
+    An ε-reduction gives a non-terminal node with no children. Nodes are
+    numbered in the order they are completed (post-order), so every child
+    has a lower ID than its parent.
+    """
+
+    def __init__(self, n_terminals):
+        self.n_terminals = n_terminals
+        self.symbol = array('i')
+        self.child_start = array('i')
+        self.child_count = array('i')
+        self.children = array('i')
+        self.root = None
+
+    def add_leaf(self, term_id, position):
+        self.symbol.append(term_id)
+        self.child_start.append(position)
+        self.child_count.append(0)
+        return len(self.symbol) - 1
+
+    def add_node(self, sym_id, child_ids):
+        self.symbol.append(sym_id)
+        self.child_start.append(len(self.children))
+        self.child_count.append(len(child_ids))
+        self.children.extend(child_ids)
+        return len(self.symbol) - 1
+
+    def children_of(self, node):
+        if not self.child_count[node]:
+            return ()
+        start = self.child_start[node]
+        return self.children[start:start + self.child_count[node]]
+
+    def is_leaf(self, node):
+        return self.symbol[node] < self.n_terminals
+
+    def __len__(self):
+        return len(self.symbol)
+
+
+# --------------------------------------------------
+# BUILDER
+# --------------------------------------------------
+
+class TreeBuilder:
+    """parse_tokens recorder that builds a ParseTree and/or semantic values.
+
+    actions maps production IDs to callables taking the list of child values
+    and returning the value of the reduced node; productions without a hook
+    take the value of their first child (None for ε). Leaf values come from
+    leaf_value(term_id, position); if it is omitted they are the leaf node
+    IDs, or None with build_tree=False, since no arena is kept then and only
+    values are computed.
+    """
+
+    def __init__(self, tables, actions=None, leaf_value=None, build_tree=True):
+        self.prod_left = tables.prod_left
+        self.prod_len = tables.prod_len
+        self.n_terminals = tables.n_terminals
+        self.actions = actions
+        self.leaf_value = leaf_value
+        self.tree = ParseTree(tables.n_terminals) if build_tree else None
+
+        self._nodes = []   # node IDs of the symbols on the parse stack
+        self._values = []  # their semantic values, if any are computed
+        self._compute_values = actions is not None or leaf_value is not None
+        self.value = None
+
+    def __call__(self, kind, position, arg, target):
+        tree = self.tree
+
+        if kind == 'shift':
+            node = None
+            if tree is not None:
+                node = tree.add_leaf(arg, position)
+                self._nodes.append(node)
+            if self._compute_values:
+                self._values.append(self.leaf_value(arg, position) if self.leaf_value is not None else node)
+
+        elif kind == 'reduce':
+            rhs_len = self.prod_len[arg]
+            if tree is not None:
+                child_ids = self._nodes[len(self._nodes) - rhs_len:]
+                del self._nodes[len(self._nodes) - rhs_len:]
+                self._nodes.append(tree.add_node(self.prod_left[arg] + self.n_terminals, child_ids))
+
+            if self._compute_values:
+                values = self._values[len(self._values) - rhs_len:]
+                del self._values[len(self._values) - rhs_len:]
+                action = self.actions.get(arg) if self.actions is not None else None
+                if action is not None:
+                    value = action(values)
+                else:
+                    value = values[0] if values else None
+                self._values.append(value)
+
+        elif kind == 'accept':
+            if tree is not None:
+                tree.root = self._nodes[-1]
+            if self._compute_values:
+                self.value = self._values[-1]
+
+
+def parse_tree(tables, tokens, actions=None, leaf_value=None, build_tree=True):
+    """Parse an iterable of terminal IDs and return (ParseResult, TreeBuilder).
+
+    On success builder.tree.root is the start symbol's node and builder.value
+    its semantic value; on error both are left unset.
+    """
+    builder = TreeBuilder(tables, actions, leaf_value, build_tree)
+    result = parse_tokens(tables, tokens, builder)
+    if builder.tree is not None:
+        logger.info(f"[LOG parse_tree] ========= Built parse tree with {len(builder.tree)} nodes")
+    return result, builder
@@ -3,6 +3,9 @@ import axios from 'axios';
 import { Network } from 'vis-network/standalone';
 import './App.css';
 
+// States fetched for the graph and tables; larger automata are shown truncated
+const VISIBLE_STATES = 500;
+
 function App() {
   const [grammarInput, setGrammarInput] = useState({
     non_terminals: 'E,T,F',
@@ -51,6 +54,10 @@ function App() {
         start_symbol: grammarInput.start_symbol.trim(),
         productions: grammarInput.productions.split('\n').map(s => s.trim()).filter(s => s)
       };
+      // Lets the server rebuild only what changed since the last build
+      if (data?.grammar_id) {
+        payload.base_grammar_id = data.grammar_id;
+      }
       
       if (!payload.start_symbol || payload.productions.length === 0) {
         showToast('Please fill in all required fields', 'error');
@@ -59,7 +66,20 @@ function App() {
       }
 
       const response = await axios.post('http://localhost:5000/build_grammar', payload);
-      setData(response.data);
+      // The build response only holds sizes; fetch the first page of states and table rows
+      const base = `http://localhost:5000/grammar/${response.data.grammar_id}`;
+      const page = { params: { offset: 0, limit: VISIBLE_STATES } };
+      const [states, transitions, tables] = await Promise.all([
+        axios.get(`${base}/clr/states`, page),
+        axios.get(`${base}/clr/transitions`, page),
+        axios.get(`${base}/tables`, { params: { ...page.params, format: 'strings' } })
+      ]);
+      setData({
+        ...response.data,
+        clr_states: states.data.states,
+        clr_transitions: transitions.data.transitions,
+        clr_tables: { ACTION: tables.data.ACTION, GOTO: tables.data.GOTO }
+      });
       setActiveStep(2);
       showToast('Grammar built successfully!', 'success');
     } catch (error) {
@@ -80,7 +100,7 @@ function App() {
     }
     setLoading(true);
     try {
-      const response = await axios.post('http://localhost:5000/parse', { input: parseInput });
+      const response = await axios.post('http://localhost:5000/parse', { input: parseInput, grammar_id: data.grammar_id, trace: true });
       setParseResult(response.data);
       if (response.data.success) {
         showToast('Input parsed successfully!', 'success');
@@ -411,7 +431,7 @@ function App() {
             <div className="section">
               <div className="section-header">
                 <h3>State Details</h3>
-                <span className="state-count">{data.clr_states.length} states</span>
+                <span className="state-count">{data.clr.n_states} states</span>
               </div>
               <div className="states-grid">
                 {data.clr_states.map((state) => (
@@ -578,7 +598,7 @@ function App() {
               <div className="section">
                 <div className="section-header">
                   <h3>Parsing Steps</h3>
-                  <button onClick={() => copyToClipboard(parseResult.steps.join('\n'))} className="btn-icon" title="Copy steps">
+                  <button onClick={() => copyToClipboard(parseResult.steps.map(step => `Stack: ${step.stack} | Input: ${step.input} | Action: ${step.action}`).join('\n'))} className="btn-icon" title="Copy steps">
                     📋
                   </button>
                 </div>
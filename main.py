@@ -2,8 +2,8 @@
 
 from core.Item import Item
 from core.grammar import Grammar, NonTerminal, Terminal, Production
-from core.clr_utils import closure, build_CLR_states, build_parsing_tables, parse_input, tokenize
-from core.lalr_utils import build_LALR_states
+from core.clr_utils import closure, build_parsing_tables, parse_input, tokenize
+from core.lalr_utils import build_LALR_states_from_LR0
 
 def build_local_example_grammar():
     E = NonTerminal('E')
@@ -95,7 +95,7 @@ if __name__ == "__main__":
     star_item = Item(star_prod, dot=0, lookahead=Terminal('$'))
     items = closure({star_item}, grammar)
 
-    states, transitions = build_LALR_states(grammar)
+    states, transitions = build_LALR_states_from_LR0(grammar)
     print("\nStates:\n")
     for i, state in enumerate(states):
         print(f"State {i}")
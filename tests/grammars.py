@@ -0,0 +1,32 @@
+import random
+
+from core.grammar import Grammar, NonTerminal, Terminal, Production
+
+
+def make_grammar(spec):
+    """Augmented Grammar from {name: [[symbol names], ...]}, the start symbol being 'S'.
+
+    Names that are keys of spec are non-terminals, the others terminals.
+    """
+    non_terminals = {name: NonTerminal(name) for name in spec}
+    productions = [
+        Production(non_terminals[left], [non_terminals.get(name) or Terminal(name) for name in right])
+        for left, rights in spec.items()
+        for right in rights
+    ]
+    grammar = Grammar(non_terminals['S'], productions)
+    grammar.augment()
+    grammar.terminals.add(Terminal('$'))
+    grammar.compute_first()
+    return grammar
+
+
+def random_spec(seed, max_non_terminals=5, terminals='abcd'):
+    """Random grammar spec; it may have empty, non-productive and unreachable non-terminals"""
+    rng = random.Random(seed)
+    names = ['S'] + [f'N{i}' for i in range(rng.randint(1, max_non_terminals))]
+    symbols = names + list(terminals[:rng.randint(1, len(terminals))])
+    return {
+        name: [[rng.choice(symbols) for _ in range(rng.randint(0, 3))] for _ in range(rng.randint(1, 3))]
+        for name in names
+    }
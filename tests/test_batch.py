@@ -0,0 +1,27 @@
+import random
+
+import core.pools as pools
+from core.batch import parse_batch
+from core.clr_utils import build_LR1_automaton
+from core.lexer import compile_lexer
+from core.tables import build_encoded_tables
+
+from grammars import make_grammar
+
+
+def outcome(result):
+    return result.accepted, result.position, result.state, result.token
+
+
+def test_pool_matches_serial_and_writes_payload_once(monkeypatch):
+    monkeypatch.setattr(pools, '_payloads', {})
+    grammar = make_grammar({'S': [['S', '+', 'T'], ['T']], 'T': [['id'], ['(', 'S', ')']]})
+    tables = build_encoded_tables(*build_LR1_automaton(grammar), grammar)
+    lexer = compile_lexer(grammar)
+    rng = random.Random(0)
+    inputs = [' '.join(rng.choice(['id', '+', '(', ')']) for _ in range(rng.randint(1, 8))) for _ in range(200)]
+
+    expected = [outcome(r) for r in parse_batch(grammar, tables, lexer, inputs, workers=1)]
+    for _ in range(2):
+        assert [outcome(r) for r in parse_batch(grammar, tables, lexer, inputs, workers=2)] == expected
+    assert len(pools._payloads) == 1
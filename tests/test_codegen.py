@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from core.clr_utils import build_LR1_automaton
+from core.codegen import generate_parser_module
+from core.lexer import compile_lexer
+from core.parser import parse_tokens
+from core.tables import build_encoded_tables
+from core.tree import parse_tree
+
+from grammars import make_grammar
+
+
+def test_generated_module_parses_like_parse_tokens():
+    grammar = make_grammar({
+        'S': [['S', '+', 'T'], ['S', '-', 'T'], ['T']],
+        'T': [['T', '*', 'F'], ['F']],
+        'F': [['(', 'S', ')'], ['num']],
+    })
+    tables = build_encoded_tables(*build_LR1_automaton(grammar), grammar)
+    lexer = compile_lexer(grammar)
+    module = {}
+    exec(compile(generate_parser_module(grammar, tables, lexer), '<generated>', 'exec'), module)
+    ParseError = module['ParseError']
+
+    productions = [str(prod) for prod in grammar.productions]
+    by_text = {text: prod_id for prod_id, text in enumerate(productions)}
+    evaluate = {
+        by_text['S → S + T']: lambda v: v[0] + v[2],
+        by_text['S → S - T']: lambda v: v[0] - v[2],
+        by_text['T → T * F']: lambda v: v[0] * v[2],
+        by_text['F → ( S )']: lambda v: v[1],
+        by_text['F → num']: lambda v: int(v[0]),
+    }
+
+    rng = random.Random(0)
+    accepted = 0
+    for _ in range(1000):
+        text = ' '.join(rng.choice(['1', '23', '+', '-', '*', '(', ')', '4 + 5', '%']) for _ in range(rng.randint(1, 9)))
+        tokens = list(lexer.tokens(text))
+        assert list(module['tokens'](text)) == tokens
+
+        expected, builder = parse_tree(tables, [t for t, _, _ in tokens], evaluate, lambda _, position: tokens[position][1])
+        if expected.accepted:
+            assert module['parse'](text, evaluate) == builder.value == eval(text)
+            accepted += 1
+        else:
+            assert not parse_tokens(tables, [t for t, _, _ in tokens]).accepted
+            with pytest.raises(ParseError) as error:
+                module['parse'](text)
+            assert error.value.offset == tokens[expected.position][2]
+            assert error.value.state == expected.state
+            assert error.value.term_id == expected.token
+    assert accepted > 30, accepted
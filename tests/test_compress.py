@@ -0,0 +1,53 @@
+from core.clr_utils import build_LR1_automaton
+from core.compress import compress_tables
+from core.grammar import NONASSOC, LEFT, Terminal
+from core.parser import parse_tokens
+from core.tables import ERROR, ACCEPT, build_encoded_tables
+
+from grammars import make_grammar, random_spec
+
+
+def tables_for(grammar):
+    return build_encoded_tables(*build_LR1_automaton(grammar), grammar)
+
+
+def test_lookups_agree_with_dense_tables():
+    for seed in range(200):
+        tables = tables_for(make_grammar(random_spec(seed)))
+        compressed = compress_tables(tables)
+        for state in range(tables.n_states):
+            for term_id in range(tables.n_terminals):
+                code = tables.action_at(state, term_id)
+                packed = compressed.action_at(state, term_id)
+                if code == ERROR:
+                    # Only a default reduction may stand in for an error cell
+                    assert packed in (ERROR, compressed.action_default[state]), seed
+                    assert packed == ERROR or packed < ACCEPT, seed
+                else:
+                    assert packed == code, seed
+            for nt_index in range(tables.n_non_terminals):
+                target = tables.goto_at(state, nt_index)
+                if target >= 0:
+                    assert compressed.goto_at(state, nt_index) == target, seed
+
+
+def test_nonassoc_errors_survive_default_reductions():
+    grammar = make_grammar({'S': [['S', '<', 'S'], ['S', '+', 'S'], ['id']]})
+    grammar.set_precedence([(NONASSOC, [Terminal('<')]), (LEFT, [Terminal('+')])])
+    tables = tables_for(grammar)
+    compressed = compress_tables(tables)
+
+    errors = [key for key, conflict in tables.conflicts.items() if conflict.chosen == ERROR]
+    assert errors
+    for state, term_id in errors:
+        assert compressed.action_default[state] != ERROR
+        assert compressed.action_at(state, term_id) == ERROR
+
+    def tokens(names):
+        return [grammar.symbol_ids[Terminal(name)] for name in names] + [grammar.end_id]
+
+    for names in (['id', '<', 'id'], ['id', '<', 'id', '+', 'id'], ['id', '<', 'id', '<', 'id']):
+        expected = parse_tokens(tables, tokens(names))
+        result = parse_tokens(compressed, tokens(names))
+        assert result.accepted == expected.accepted
+    assert not parse_tokens(compressed, tokens(['id', '<', 'id', '<', 'id'])).accepted
@@ -0,0 +1,70 @@
+import itertools
+import math
+import random
+
+from core.clr_utils import build_LR1_automaton
+from core.glr import parse_glr
+from core.grammar import Terminal
+from core.tables import build_encoded_tables
+from core.tree import parse_tree
+
+from grammars import make_grammar, random_spec
+
+
+def tables_for(grammar):
+    return build_encoded_tables(*build_LR1_automaton(grammar), grammar)
+
+
+def token_ids(grammar, names):
+    return [grammar.symbol_ids[Terminal(name)] for name in names] + [grammar.end_id]
+
+
+def shape(tree, node):
+    """Nested (symbol, children) tuples of a ParseTree; leaves are (term_id, position)"""
+    if tree.is_leaf(node):
+        return tree.symbol[node], tree.child_start[node]
+    return tree.symbol[node], tuple(shape(tree, child) for child in tree.children_of(node))
+
+
+def test_ambiguous_sums_count_catalan_trees():
+    grammar = make_grammar({'S': [['S', '+', 'S'], ['id']]})
+    tables = tables_for(grammar)
+    for operands in range(1, 9):
+        names = ['id'] + ['+', 'id'] * (operands - 1)
+        result = parse_glr(tables, token_ids(grammar, names))
+        assert result.accepted
+        catalan = math.comb(2 * (operands - 1), operands - 1) // operands
+        assert result.forest.count_trees() == catalan
+
+
+def test_cyclic_grammar_has_infinitely_many_trees():
+    grammar = make_grammar({'S': [['S', 'S'], ['a'], []]})
+    tables = tables_for(grammar)
+    for length in range(3):
+        result = parse_glr(tables, token_ids(grammar, ['a'] * length))
+        assert result.accepted
+        assert result.forest.count_trees() == float('inf')
+
+
+def test_first_tree_matches_parse_tree_without_conflicts():
+    rng = random.Random(0)
+    checked = 0
+    for seed in range(200):
+        grammar = make_grammar(random_spec(seed))
+        tables = tables_for(grammar)
+        terminals = [sym.name for sym in grammar.symbols[:grammar.n_terminals] if sym.name != '$']
+        if tables.conflicts or not terminals:
+            continue
+        inputs = [names for length in range(4) for names in itertools.product(terminals, repeat=length)]
+        inputs += [[rng.choice(terminals) for _ in range(rng.randint(4, 8))] for _ in range(50)]
+        for names in inputs:
+            tokens = token_ids(grammar, names)
+            expected, builder = parse_tree(tables, tokens)
+            result = parse_glr(tables, tokens)
+            assert result.accepted == expected.accepted, (seed, names)
+            if expected.accepted:
+                assert result.forest.count_trees() == 1
+                tree = result.forest.first_tree()
+                assert shape(tree, tree.root) == shape(builder.tree, builder.tree.root), (seed, names)
+                checked += 1
+    assert checked > 100, checked
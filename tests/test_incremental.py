@@ -0,0 +1,64 @@
+import random
+import re
+
+from core.clr_utils import build_LR1_automaton
+from core.incremental import IncrementalParser
+from core.lexer import compile_lexer
+from core.tables import build_encoded_tables
+from core.tree import parse_tree
+
+from grammars import make_grammar
+
+PIECES = ['', ' ', 'a', 'bc', '1', '+', '*', '(', ')', ' + x', '(y)', ' * 2 ', 'z +']
+OPERANDS = ['x', '42', '(y + z)', 'a * (b + 1)']
+
+
+def random_edit(rng, text):
+    """(offset, deleted, inserted) replacing an operand, or a random edit that is often invalid"""
+    operands = list(re.finditer(r'\w+', text))
+    if operands and rng.random() < 0.7:
+        m = rng.choice(operands)
+        return m.start(), m.end() - m.start(), rng.choice(OPERANDS)
+    offset = rng.randint(0, len(text))
+    return offset, rng.randint(0, min(3, len(text) - offset)), rng.choice(PIECES)
+
+
+def shape(tree, node):
+    """Nested (symbol, children) tuples of a ParseTree; leaves are (term_id, position)"""
+    if tree.is_leaf(node):
+        return tree.symbol[node], tree.child_start[node]
+    return tree.symbol[node], tuple(shape(tree, child) for child in tree.children_of(node))
+
+
+def outcome(result):
+    return result.accepted, result.position, result.state, result.token
+
+
+def test_edits_match_full_reparse():
+    grammar = make_grammar({
+        'S': [['S', '+', 'T'], ['T']],
+        'T': [['T', '*', 'F'], ['F']],
+        'F': [['(', 'S', ')'], ['id'], ['num']],
+    })
+    tables = build_encoded_tables(*build_LR1_automaton(grammar), grammar)
+    lexer = compile_lexer(grammar)
+    rng = random.Random(0)
+    accepted = 0
+
+    for trial in range(100):
+        parser = IncrementalParser(tables, lexer, 'a + b * (c + 1)')
+        for step in range(30):
+            if not parser.result.accepted and rng.random() < 0.5:
+                # Undo the last edit, parsing against the tree from before it
+                offset, deleted, inserted = undo
+            else:
+                offset, deleted, inserted = random_edit(rng, parser.text)
+            undo = offset, len(inserted), parser.text[offset:offset + deleted]
+            result = parser.edit(offset, deleted, inserted)
+            full, builder = parse_tree(tables, lexer.token_ids(parser.text))
+            assert outcome(result) == outcome(full), (trial, step, parser.text)
+            if result.accepted:
+                tree, expected = parser.to_tree(), builder.tree
+                assert shape(tree, tree.root) == shape(expected, expected.root), (trial, step, parser.text)
+                accepted += 1
+    assert 500 < accepted < 2500, accepted
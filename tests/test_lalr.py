@@ -0,0 +1,19 @@
+from core.clr_utils import build_LR1_automaton
+from core.lalr_utils import build_LALR_automaton_from_LR0, merge_LR1_states
+
+from grammars import make_grammar, random_spec
+
+
+def test_lalr_from_lr0_matches_merged_lr1():
+    for seed in range(300):
+        grammar = make_grammar(random_spec(seed))
+        assert build_LALR_automaton_from_LR0(grammar) == merge_LR1_states(*build_LR1_automaton(grammar)), seed
+
+
+def test_lalr_from_lr0_with_non_productive_symbols():
+    for seed in (41, 69, 80, 83, 103):
+        grammar = make_grammar(random_spec(seed))
+        assert build_LALR_automaton_from_LR0(grammar) == merge_LR1_states(*build_LR1_automaton(grammar)), seed
+    # N0 -> N0 a never derives a terminal string
+    grammar = make_grammar({'S': [['a', 'N0'], ['b']], 'N0': [['N0', 'a']]})
+    assert build_LALR_automaton_from_LR0(grammar) == merge_LR1_states(*build_LR1_automaton(grammar))
@@ -0,0 +1,16 @@
+from core.lexer import Lexer
+
+
+def test_chunks_with_token_classes_only():
+    lexer = Lexer({'id': 0, '$': 1}, 1)
+    tokens = list(lexer.tokens_from_chunks(['ab', 'cd ef']))
+    assert [text for _, text, _ in tokens] == ['abcd', 'ef', '$']
+    assert [start for _, _, start in tokens] == [0, 5, 7]
+
+
+def test_chunks_match_whole_text():
+    lexer = Lexer({'id': 0, 'num': 1, '+': 2, '+=': 3, '$': 4}, 4)
+    text = 'ab += 12+c3 +x'
+    for size in range(1, len(text) + 1):
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        assert list(lexer.tokens_from_chunks(chunks)) == list(lexer.tokens(text))
@@ -0,0 +1,25 @@
+import pickle
+
+import core.parallel_lr1 as parallel_lr1
+from core.clr_utils import build_LR1_automaton
+
+from grammars import make_grammar, random_spec
+
+
+def test_pickled_grammar_leaves_out_caches():
+    grammar = make_grammar(random_spec(0))
+    before = pickle.dumps(grammar)
+    build_LR1_automaton(grammar)
+    assert grammar.closure_cache
+    assert pickle.dumps(grammar) == before
+    copy = pickle.loads(before)
+    assert copy.closure_cache == {} and copy.lexer_cache == {} and copy.item_text_cache == {}
+    assert copy.first_bits == grammar.first_bits
+
+
+def test_parallel_numbering_matches_sequential(monkeypatch):
+    monkeypatch.setattr(parallel_lr1, 'MIN_PARALLEL_KERNELS', 2)
+    for seed in range(30):
+        grammar = make_grammar(random_spec(seed))
+        expected = build_LR1_automaton(grammar)
+        assert parallel_lr1.build_LR1_automaton_parallel(grammar, workers=2) == expected, seed
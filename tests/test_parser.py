@@ -0,0 +1,30 @@
+import pytest
+
+from core.clr_utils import build_LR1_automaton
+from core.grammar import Terminal
+from core.parser import PushParser
+from core.tables import build_encoded_tables
+
+from grammars import make_grammar
+
+
+def test_push_parser_never_exceeds_max_depth():
+    # Nested parentheses around an empty production: shifts and ε-reductions both push
+    grammar = make_grammar({'S': [['(', 'S', ')'], ['A']], 'A': [[]]})
+    tables = build_encoded_tables(*build_LR1_automaton(grammar), grammar)
+    tokens = [grammar.symbol_ids[Terminal(name)] for name in '((()))']
+
+    for max_depth in range(1, 8):
+        parser = PushParser(tables, grammar.end_id, max_depth=max_depth)
+        try:
+            for token in tokens:
+                parser.feed(token)
+                assert parser.depth <= max_depth
+            assert parser.finish().accepted
+            assert max_depth >= 6
+        except OverflowError:
+            assert parser.depth <= max_depth and max_depth < 6
+            stack = list(parser.stack)
+            with pytest.raises(OverflowError):
+                parser.feed(tokens[parser.position])
+            assert parser.stack == stack